@@ -1,11 +1,26 @@
 from ._base import DeviceManager, UnpluggedError
-devices = DeviceManager()  # pylint: disable=invalid-name
+
+# The DeviceManager searches for devices when it is made, so it is only made the first time it is used
+_devices = None
+
+
+def _get_devices():
+    global _devices
+    if _devices is None:
+        _devices = DeviceManager()
+    return _devices
+
+
+def __getattr__(name):
+    if name == "devices":
+        return _get_devices()
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
 
 
 def get_gamepad(index=0):
     """Get a single action from a gamepad. DOES NOT CHECK ERRORS ENSURE TO check_gamepad BEFORE USING"""
 
-    gamepad = devices.gamepads[index]
+    gamepad = _get_devices().gamepads[index]
     return gamepad.read()
 
 
@@ -14,7 +29,7 @@ def check_gamepad():
     # e = None
 
     try:
-        devices.gamepads[0]
+        _get_devices().gamepads[0]
     except IndexError:
         return False
 
@@ -46,6 +46,7 @@ import os
 import sys
 import io
 import glob
+import select
 import struct
 import platform
 import math
@@ -98,6 +99,7 @@ def iter_unpack(raw):
 # long, long, unsigned short, unsigned short, int
 EVENT_FORMAT = str('llHHi')
 EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+EVENT_STRUCT = struct.Struct(EVENT_FORMAT)
 
 XINPUT_MAPPING = (
     (1, 0x11),
@@ -289,7 +291,7 @@ CURRENT = ()
 
 EVENT_MAP = (
     ('types', EVENT_TYPES),
-    ('type_codes', ((GP_value, GP_key) for GP_key, GP_value in EVENT_TYPES)),
+    ('type_codes', tuple((GP_value, GP_key) for GP_key, GP_value in EVENT_TYPES)),
     ('xpad', XINPUT_MAPPING),
     ('Sync', SYNCHRONIZATION_EVENTS),
     ('Key', KEYS_AND_BUTTONS),
@@ -306,6 +308,21 @@ EVENT_MAP = (
     ('Current', CURRENT))
 
 
+def _code_table(codes):
+    """List of names indexed by code, None where a code has no name."""
+    table = [None] * (max(code for code, _ in codes) + 1) if codes else []
+    for code, name in codes:
+        table[code] = name
+    return table
+
+
+# Built once so the name of an event is two list indexes
+EVENT_TYPE_NAMES = _code_table(EVENT_TYPES)
+EVENT_CODE_NAMES = {
+    name: _code_table(codes) for name, codes in EVENT_MAP
+    if name not in ('types', 'type_codes', 'xpad')}
+
+
 # Now comes all the structs we need to parse the infomation coming
 # from Windows.
 class XinputGamepad(ctypes.Structure):
@@ -382,17 +399,21 @@ class UnknownEventCode(IndexError):
 
 
 class InputEvent(object):
-    """A user event."""
+    """A user event. type_id and code_id are the raw evdev numbers."""
 
-    # pylint: disable=too-few-public-methods
-    def __init__(self,
-                 device,
-                 event_info):
+    __slots__ = ('device', 'timestamp', 'code', 'state', 'ev_type',
+                 'type_id', 'code_id')
+
+    # pylint: disable=too-few-public-methods,too-many-arguments
+    def __init__(self, device, timestamp, code, state, ev_type,
+                 type_id=None, code_id=None):
         self.device = device
-        self.timestamp = event_info["timestamp"]
-        self.code = event_info["code"]
-        self.state = event_info["state"]
-        self.ev_type = event_info["ev_type"]
+        self.timestamp = timestamp
+        self.code = code
+        self.state = state
+        self.ev_type = ev_type
+        self.type_id = type_id
+        self.code_id = code_id
 
 
 class BaseListener(object):
@@ -558,8 +579,17 @@ class InputDevice(object):
     # pylint: disable=too-many-instance-attributes
     def __init__(self, manager, device_path,
                  char_path_override=None,
-                 read_size=1):
+                 read_size=None):
+        # Most events taken per read. Only Linux reads whatever is
+        # available, elsewhere a read waits for read_size events, so it
+        # keeps taking one at a time
+        if read_size is None:
+            read_size = 64 if NIX else 1
         self.read_size = read_size
+        # Reused for every read on Linux, made on the first read
+        self.__buffer = None
+        # Iterator that read takes events from
+        self.__events = None
         self.manager = manager
         self._device_path = device_path
         self.protocol, _, self.device_type = self._get_path_infomation()
@@ -605,8 +635,17 @@ class InputDevice(object):
                 self._character_file = io.BytesIO()
                 return self._character_file
             try:
-                self._character_file = io.open(
-                    self._character_device_path, 'rb')
+                if NIX:
+                    # Unbuffered and non-blocking, so a read takes everything
+                    # that is available without waiting for more
+                    self._character_file = io.open(
+                        self._character_device_path, 'rb', buffering=0)
+                    os.set_blocking(self._character_file.fileno(), False)
+                else:
+                    # _get_data reads in blocking mode, a non-blocking read
+                    # would return nothing and spin
+                    self._character_file = io.open(
+                        self._character_device_path, 'rb')
             except IOError as err:
                 if err.errno == 13:
                     raise PermissionDenied(
@@ -624,6 +663,10 @@ class InputDevice(object):
             if event:
                 yield event
 
+    def fileno(self):
+        """The file descriptor of the character device, so it can be waited on (Linux only)."""
+        return self._character_device.fileno()
+
     def _get_data(self, read_size):
         """Get data from the character device."""
         return self._character_device.read(read_size)
@@ -634,7 +677,28 @@ class InputDevice(object):
         subclasses."""
         return False
 
+    def _read_available(self, wait=False):
+        """Read every event that is available (up to read_size) with one
+        read into a reused buffer. Linux only.
+        :param wait: block until there is at least one event
+        :returns a list of InputEvents, empty when there were none"""
+        device = self._character_device
+        if self.__buffer is None:
+            self.__buffer = memoryview(
+                bytearray(EVENT_SIZE * max(1, self.read_size)))
+        size = device.readinto(self.__buffer)
+        while size is None and wait:
+            select.select([device], [], [])
+            size = device.readinto(self.__buffer)
+        if not size:
+            return []
+        make_event = self._make_event
+        return [make_event(*event) for event in EVENT_STRUCT.iter_unpack(
+            self.__buffer[:size - size % EVENT_SIZE])]
+
     def _do_iter(self):
+        if NIX:
+            return self._read_available(wait=True)
         if self.read_size:
             read_size = EVENT_SIZE * self.read_size
         else:
@@ -648,19 +712,23 @@ class InputDevice(object):
 
     # pylint: disable=too-many-arguments
     def _make_event(self, tv_sec, tv_usec, ev_type, code, value):
-        event_type = self.manager.get_event_type(ev_type)
-        eventinfo = {
-            "ev_type": event_type,
-            "state": value,
-            "timestamp": tv_sec + (tv_usec / 1000000),
-            "code": self.manager.get_event_string(event_type, code)
-        }
-
-        return InputEvent(self, eventinfo)
+        try:
+            event_type = EVENT_TYPE_NAMES[ev_type]
+            name = EVENT_CODE_NAMES[event_type][code]
+        except (IndexError, KeyError):
+            name = None
+        if name is None or WIN:
+            # Unknown events raise, and Windows key codes are mapped first
+            event_type = self.manager.get_event_type(ev_type)
+            name = self.manager.get_event_string(event_type, code)
+        return InputEvent(self, tv_sec + (tv_usec / 1000000), name, value,
+                          event_type, ev_type, code)
 
     def read(self):
-        """Read the next input event."""
-        return next(iter(self))
+        """Read the next input events."""
+        if self.__events is None:
+            self.__events = iter(self)
+        return next(self.__events)
 
     @property
     def _pipe(self):
@@ -1120,12 +1188,14 @@ class DeviceManager(object):
         except IndexError:
             raise IndexError("list index out of range")
 
-    def get_event_type(self, raw_type):
+    @staticmethod
+    def get_event_type(raw_type):
         """Convert the code to a useful string name."""
-        try:
-            return self.codes['types'][raw_type]
-        except KeyError:
+        name = (EVENT_TYPE_NAMES[raw_type]
+                if 0 <= raw_type < len(EVENT_TYPE_NAMES) else None)
+        if name is None:
             raise UnknownEventType("We don't know this event type")
+        return name
 
     def get_event_string(self, evtype, code):
         """Get the string name of the event."""
@@ -1135,7 +1205,8 @@ class DeviceManager(object):
                 code = self.codes['wincodes'][code]
             except KeyError:
                 pass
-        try:
-            return self.codes[evtype][code]
-        except KeyError:
+        names = EVENT_CODE_NAMES.get(evtype, ())
+        name = names[code] if 0 <= code < len(names) else None
+        if name is None:
             raise UnknownEventCode("We don't know this event.")
+        return name
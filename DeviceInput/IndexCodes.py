@@ -4,6 +4,7 @@
 # Description: All reference codes for button presses. Allows for a layer of abstraction between back-end and front-end
 
 from pynput import mouse as _mouse
+from .Gamepad._base import EVENT_CODE_NAMES as _EVENT_CODE_NAMES, EVENT_TYPE_NAMES as _EVENT_TYPE_NAMES
 
 
 # import re as _re
@@ -134,12 +135,28 @@ class XCode:
         "DPAD3Y": "DPAD3",
     }
 
+    # [type id][code id]: XCode, made the first time from_evdev is used
+    __by_evdev = None
+
     @staticmethod
     def code_of(button):
         button = button[4:]
         button = XCode.__special[button] if XCode.__special.get(button, False) else button
         return vars(XCode).get(button, None)
 
+    @staticmethod
+    def from_evdev(type_id, code_id):
+        """:returns the XCode of a raw evdev event type and code, None if it has none"""
+        table = XCode.__by_evdev
+        if table is None:
+            table = XCode.__by_evdev = [
+                [XCode.code_of(name) if name else None for name in _EVENT_CODE_NAMES.get(type_name, ())]
+                for type_name in _EVENT_TYPE_NAMES]
+        try:
+            return table[type_id][code_id]
+        except IndexError:
+            return None
+
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
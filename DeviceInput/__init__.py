@@ -9,7 +9,12 @@ from .Gamepad import get_gamepad as _get_gamepad
 from .Gamepad import check_gamepad as _check_gamepad
 from .Gamepad import UnpluggedError as _UnpluggedError
 from .IndexCodes import ButtonCode, KeyCode, XCode
+from .dispatch import Dispatcher, Event, EventRing, coalesce as _coalesce
+from .aio import events, gamepad_change as _gamepad_change
+from heapq import merge as _merge
+from operator import attrgetter as _attrgetter
 from threading import Thread as _Thread
+from time import perf_counter as _perf_counter
 from ..utils.logger import Logger
 # Gamepad is a stripped down inputs.py (mouse and keyboard handlers were not working)
 
@@ -17,17 +22,39 @@ __logger = Logger(__name__, Logger.ERROR, "input.log")
 
 # todo fix 2d checking (ACCESS)
 class UpdateChecker:
-    def __init__(self):
+    """
+    Latest state of a device. Reading a key takes it out of update_list.
+    Once recording is started (by the handler thread of the device, or record), every change is also kept as an
+    Event, written by one listener thread and drained by the game loop once a frame, so a press and release within
+    one frame are both seen. The ring is bounded, so a device nobody drains only counts overflows
+    """
+    def __init__(self, device=None, capacity=4096, latest=(), summed=()):
+        """
+        :param device: name put in the events
+        :param capacity: most events kept between drains, see EventRing
+        :param latest: codes whose changes are merged into the last one when coalescing
+        :param summed: codes whose changes are added together when coalescing
+        """
+        self.device = device
+        self.latest = frozenset(latest)
+        self.summed = frozenset(summed)
         self.__vals = {}
         self.__updated = set()
+        self.__events = EventRing(capacity)
+        self.__recording = False
 
     def __setitem__(self, key, value):
         self.__vals[key] = value
         self.__updated.add(key)
+        if self.__recording:
+            self.__events.push(Event(_perf_counter(), self.device, key, value))
+
+    def _reset(self, key, value):
+        """Sets the state without making an event"""
+        self.__vals[key] = value
 
     def __getitem__(self, item):
-        if self.__updated.__contains__(item):
-            self.__updated.remove(item)
+        self.__updated.discard(item)
         return self.__vals.get(item, None)
 
     def __str__(self):
@@ -36,25 +63,53 @@ class UpdateChecker:
     def keys(self):
         return [key for key in self.__vals.keys()]
 
+    def record(self):
+        """Starts keeping every change as an Event for drain"""
+        self.__recording = True
+
+    def drain(self, coalesced=False):
+        """
+        :param coalesced: merge the events of the latest and summed codes, see dispatch.coalesce
+        :returns the events since the last drain, oldest first
+        """
+        if coalesced:
+            return _coalesce(self.__events.drain(), self.latest, self.summed)
+        return self.__events.drain()
+
     @property
     def update_list(self):
+        """Keys that changed since they were last read"""
         return list(self.__updated)
 
     @property
     def has_updated(self):
         return len(self.__updated) > 0
 
+    @property
+    def overflows(self):
+        """Events lost because drain was not called for a whole ring of events"""
+        return self.__events.overflows
+
 
-keys = UpdateChecker()
-mouse = UpdateChecker()
-gamepad = UpdateChecker()
+keys = UpdateChecker("keyboard")
+mouse = UpdateChecker("mouse", latest=("pos",), summed=("HScroll", "VScroll"))
+gamepad = UpdateChecker("gamepad", latest=(XCode.LSTICK, XCode.RSTICK, XCode.LT, XCode.RT))
 
 
-def keyboard_handler(callback=None):
+def drain():
+    """:returns the events of every device since the last drain, in the order they happened"""
+    return list(_merge(keys.drain(), mouse.drain(), gamepad.drain(), key=_attrgetter("time")))
+
+
+def keyboard_handler(callback=None, batched=False):
     """
     :returns an input thread
     Call keyboard_handler.start() in order to start listening
+    :param batched: only record the events, nothing is called on the input thread. Use a Dispatcher of keys to get
+                    them in batches instead. ValueError is raised when a callback is also given
     """
+    if callback is not None and batched:
+        raise ValueError("a batched handler has no callback, give the callback to a Dispatcher instead")
     if callback is None:
         def callback():
             pass
@@ -62,67 +117,83 @@ def keyboard_handler(callback=None):
     # key handler functions
     def on_press(key):
         keys[KeyCode.code_of(key)] = True
-        callback()
+        if not batched:
+            callback()
 
     def on_release(key):
         keys[KeyCode.code_of(key)] = False
-        callback()
+        if not batched:
+            callback()
 
     def get_input():
+        keys.record()
         with _keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
             listener.join()
 
     return _Thread(target=get_input, name="Keyboard-Thread", daemon=True)
 
 
-def mouse_handler(callback=None):
+def mouse_handler(callback=None, batched=False):
     """
     :returns an input thread
     Call mouse_handler.start() in order to start listening
+    :param batched: only record the events, nothing is called on the input thread. Use a Dispatcher of mouse to get
+                    them in batches (with only the latest position and the summed scrolling) instead.
+                    ValueError is raised when a callback is also given
     """
+    if callback is not None and batched:
+        raise ValueError("a batched handler has no callback, give the callback to a Dispatcher instead")
     if callback is None:
         def callback():
             pass
 
     def on_move(x, y):
         mouse["pos"] = (x, y)
-        callback()
+        if not batched:
+            callback()
 
     def on_click(x, y, button, pressed):
         mouse[ButtonCode.code_of(button)] = pressed
-        callback()
+        if not batched:
+            callback()
 
     def on_scroll(x, y, dx, dy):
         mouse["HScroll"] = dx
         mouse["VScroll"] = dy
-        callback()
+        if not batched:
+            callback()
 
     # Collect events until released
     def get_input():
+        mouse.record()
         with _mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll) as listener:
             listener.join()
 
     return _Thread(target=get_input, name="Mouse-Thread", daemon=True)
 
 
-def gamepad_handler(callback=None):
+def gamepad_handler(callback=None, batched=False):
     """
     :returns an input thread
     Call keyboard_handler.start() in order to start listening
     *NOTE* IF THERE IS NO CONTROLLER FOUND, the thread will exit
+    :param batched: only record the events, nothing is called on the input thread. Use a Dispatcher of gamepad to
+                    get them in batches instead. ValueError is raised when a callback is also given
     """
+    if callback is not None and batched:
+        raise ValueError("a batched handler has no callback, give the callback to a Dispatcher instead")
     if callback is None:
         def callback():
             pass
 
-    gamepad[XCode.DPAD0] = [0, 0]
-    gamepad[XCode.DPAD1] = [0, 0]
-    gamepad[XCode.DPAD2] = [0, 0]
-    gamepad[XCode.DPAD3] = [0, 0]
+    gamepad._reset(XCode.DPAD0, [0, 0])
+    gamepad._reset(XCode.DPAD1, [0, 0])
+    gamepad._reset(XCode.DPAD2, [0, 0])
+    gamepad._reset(XCode.DPAD3, [0, 0])
 
     # STICKS ARE BUGGED!!
-    gamepad[XCode.LSTICK] = [0, 0]
-    gamepad[XCode.RSTICK] = [0, 0]
+    gamepad._reset(XCode.LSTICK, [0, 0])
+    gamepad._reset(XCode.RSTICK, [0, 0])
 
     e = False
     if not _check_gamepad():
@@ -133,20 +204,16 @@ def gamepad_handler(callback=None):
         if e:
             exit(-1)
 
+        gamepad.record()
         while True:
             events = _get_gamepad()
 
             for event in events:
-                index = XCode.code_of(event.code)
-                if event.ev_type == "Sync":
-                    continue
-                if event.code[-1] == "X":
-                    gamepad[index][0] = event.state
-                elif event.code[-1] == "Y":
-                    gamepad[index][1] = event.state
-                else:
-                    gamepad[index] = event.state
+                change = _gamepad_change(event, gamepad)
+                if change is not None:
+                    gamepad[change[0]] = change[1]
 
-            callback()
+            if not batched:
+                callback()
 
     return _Thread(target=get_input, name="Gamepad-Thread", daemon=True)
\ No newline at end of file
@@ -0,0 +1,139 @@
+# Author: Jacob Tsekrekos
+# Date: Oct 18, 2026
+# File: aio.py
+# Description: asyncio interface to the keyboard, mouse and gamepads
+import asyncio as _asyncio
+from collections import defaultdict as _defaultdict
+from threading import Event as _ThreadEvent
+from threading import Thread as _Thread
+from time import perf_counter as _perf_counter
+
+from pynput import keyboard as _keyboard
+from pynput import mouse as _mouse
+from .Gamepad import _get_devices
+from .Gamepad import check_gamepad as _check_gamepad
+from .Gamepad._base import NIX as _NIX
+from .IndexCodes import ButtonCode, KeyCode, XCode
+from .dispatch import Event
+
+
+def gamepad_change(event, state):
+    """
+    :param event: InputEvent read from a gamepad
+    :param state: mapping of XCode: value (None when unknown), used for the other half of the stick and dpad axes
+    :returns the (XCode, value) the event changes, None when it changes nothing
+    """
+    if event.ev_type == "Sync":
+        return None
+    if event.type_id is not None:
+        index = XCode.from_evdev(event.type_id, event.code_id)
+    else:
+        index = XCode.code_of(event.code)
+    # Axes get a new list so readers never see a half updated pair
+    if event.code[-1] == "X":
+        return index, [event.state, (state[index] or (0, 0))[1]]
+    if event.code[-1] == "Y":
+        return index, [(state[index] or (0, 0))[0], event.state]
+    return index, event.state
+
+
+async def events(keyboard=True, mouse=True, gamepad=True):
+    """
+    Yields the Events of the chosen devices as they happen, for use in an asyncio program:
+        async for event in DeviceInput.events():
+            ...
+    pynput listeners hand their events to the event loop, and on Linux gamepads are read by the event loop itself
+    when their device has data, so no thread is kept waiting for a gamepad.
+    The events are not recorded in keys, mouse and gamepad
+    """
+    loop = _asyncio.get_running_loop()
+    queue = _asyncio.Queue()
+    # Set when the generator is closed, so the threads stop handing events to it
+    stop = _ThreadEvent()
+
+    def push(device, code, value):
+        # Called on the pynput and gamepad threads
+        if stop.is_set() or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, Event(_perf_counter(), device, code, value))
+
+    def on_scroll(x, y, dx, dy):
+        push("mouse", "HScroll", dx)
+        push("mouse", "VScroll", dy)
+
+    listeners, readers = [], []
+    try:
+        if keyboard:
+            listeners.append(_keyboard.Listener(
+                on_press=lambda key: push("keyboard", KeyCode.code_of(key), True),
+                on_release=lambda key: push("keyboard", KeyCode.code_of(key), False)))
+        if mouse:
+            listeners.append(_mouse.Listener(
+                on_move=lambda x, y: push("mouse", "pos", (x, y)),
+                on_click=lambda x, y, button, pressed: push("mouse", ButtonCode.code_of(button), pressed),
+                on_scroll=on_scroll))
+        for listener in listeners:
+            listener.start()
+
+        if gamepad and _check_gamepad():
+            for pad in _get_devices().gamepads:
+                if _NIX:
+                    readers.append(_add_gamepad_reader(loop, pad, queue))
+                else:
+                    _start_gamepad_thread(pad, push, stop)
+
+        while True:
+            yield await queue.get()
+    finally:
+        stop.set()
+        for listener in listeners:
+            listener.stop()
+        for fd in readers:
+            loop.remove_reader(fd)
+
+
+def _gamepad_state():
+    state = _defaultdict(lambda: None)
+    for code in (XCode.LSTICK, XCode.RSTICK, XCode.DPAD0, XCode.DPAD1, XCode.DPAD2, XCode.DPAD3):
+        state[code] = [0, 0]
+    return state
+
+
+def _add_gamepad_reader(loop, pad, queue):
+    """Reads the gamepad's evdev device whenever the event loop sees it has data. :returns the device's fd"""
+    fd = pad.fileno()
+    state = _gamepad_state()
+
+    def on_readable():
+        try:
+            events = pad._read_available()
+        except OSError:
+            # Unplugged
+            loop.remove_reader(fd)
+            return
+
+        now = _perf_counter()
+        for event in events:
+            change = gamepad_change(event, state)
+            if change is not None:
+                state[change[0]] = change[1]
+                queue.put_nowait(Event(now, "gamepad", change[0], change[1]))
+
+    loop.add_reader(fd, on_readable)
+    return fd
+
+
+def _start_gamepad_thread(pad, push, stop):
+    """Gamepads without a device to wait on (e.g. XInput) are polled on a thread, until stop is set"""
+    def get_input():
+        state = _gamepad_state()
+        for batch in pad:
+            if stop.is_set():
+                return
+            for event in batch:
+                change = gamepad_change(event, state)
+                if change is not None:
+                    state[change[0]] = change[1]
+                    push("gamepad", change[0], change[1])
+
+    _Thread(target=get_input, name="Gamepad-Thread", daemon=True).start()
@@ -0,0 +1,126 @@
+# Author: Jacob Tsekrekos
+# Date: Oct 18, 2026
+# File: dispatch.py
+# Description: Timestamped input events and the queue that carries them from the listener threads to the game loop
+from collections import namedtuple as _namedtuple
+from heapq import merge as _merge
+from operator import attrgetter as _attrgetter
+from time import perf_counter as _perf_counter
+
+# time is time.perf_counter() when the event arrived, device is "keyboard", "mouse" or "gamepad"
+Event = _namedtuple("Event", "time device code value")
+
+
+class EventRing:
+    """
+    Bounded single producer, single consumer queue of events.
+    The producer (a listener thread) only moves the head and the consumer (the game loop) only moves the tail, so
+    neither waits on a lock. When the consumer falls a whole ring behind, new events are counted in overflows
+    instead of overwriting events that were not drained yet
+    """
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.__slots = [None] * capacity
+        # Total events pushed and drained
+        self.__head = 0
+        self.__tail = 0
+        self.overflows = 0
+
+    def __len__(self):
+        return self.__head - self.__tail
+
+    def push(self, event):
+        """Called by the producer. :returns False when the ring is full and the event was not added"""
+        head = self.__head
+        if head - self.__tail >= self.capacity:
+            self.overflows += 1
+            return False
+        self.__slots[head % self.capacity] = event
+        # Published after the slot is written, so the consumer never reads an unwritten slot
+        self.__head = head + 1
+        return True
+
+    def __pending(self, head, tail):
+        if head == tail:
+            return []
+        start, stop = tail % self.capacity, head % self.capacity
+        if start < stop:
+            return self.__slots[start:stop]
+        return self.__slots[start:] + self.__slots[:stop]
+
+    def peek(self):
+        """:returns the events that have not been drained, without draining them"""
+        return self.__pending(self.__head, self.__tail)
+
+    def drain(self):
+        """Called by the consumer. :returns every event since the last drain, oldest first"""
+        head = self.__head
+        events = self.__pending(head, self.__tail)
+        self.__tail = head
+        return events
+
+
+def coalesce(events, latest=(), summed=()):
+    """
+    Shrinks a batch of events. Codes in latest only keep their last event (e.g. the mouse position) and codes in
+    summed become one event with the total of their values (e.g. scroll steps), both placed where the last one was.
+    Every other event is kept, so a press and release are never merged
+    :returns a list of events, oldest first
+    """
+    if not latest and not summed:
+        return list(events)
+
+    out = []
+    # code: index in out of its merged event
+    merged = {}
+    for event in events:
+        code = event.code
+        if code in latest or code in summed:
+            index = merged.get(code)
+            if index is not None:
+                if code in summed:
+                    event = event._replace(value=out[index].value + event.value)
+                out[index] = None
+            merged[code] = len(out)
+        out.append(event)
+    return [event for event in out if event is not None]
+
+
+class Dispatcher:
+    """
+    Delivers input events to a callback in batches on the thread that calls pump (usually once a frame), instead of
+    calling it on the listener threads for every event. It drains the devices it is given, so their events are not
+    also available to other drain calls
+    """
+    def __init__(self, callback, devices, rate=None, coalesced=True):
+        """
+        :param callback: function(events) called with a list of Events, oldest first
+        :param devices: UpdateCheckers to deliver the events of, they start recording events
+        :param rate: most batches per second, None delivers on every pump
+        :param coalesced: merge events with the rules of each device, see coalesce
+        """
+        self.callback = callback
+        self.devices = list(devices)
+        for device in self.devices:
+            device.record()
+        self.rate = rate
+        self.coalesced = coalesced
+        self.__next_time = 0
+
+    def pump(self, now=None):
+        """
+        Delivers the events since the last batch, unless it is too soon for another batch
+        :param now: time.perf_counter() of the call, measured when None
+        :returns the amount of events delivered
+        """
+        if self.rate:
+            now = _perf_counter() if now is None else now
+            if now < self.__next_time:
+                return 0
+            self.__next_time = now + 1 / self.rate
+
+        batches = [device.drain(self.coalesced) for device in self.devices]
+        events = batches[0] if len(batches) == 1 else list(_merge(*batches, key=_attrgetter("time")))
+        if events:
+            self.callback(events)
+        return len(events)
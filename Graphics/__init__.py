@@ -1 +1,2 @@
 from .window import Window
+from .terminal import TerminalDriver, AnsiDriver, WindowsDriver, HeadlessDriver
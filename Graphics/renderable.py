@@ -1,9 +1,18 @@
-
-
 class Renderable:
     _vertexData = None
+    char = "#"
+    colour = ""
 
 
 class Sprite(Renderable):
-    def __init__(self, x1, y1, x2, y2):
-        self._vertexData = [x1, y1, x2, y2]
\ No newline at end of file
+    def __init__(self, x1, y1, x2, y2, char=None, colour=None):
+        """
+        A rectangle of pixels between two corners (inclusive)
+        :param char: value drawn in every pixel of the sprite
+        :param colour: colour escape code drawn with the value
+        """
+        self._vertexData = [x1, y1, x2, y2]
+        if char is not None:
+            self.char = char
+        if colour is not None:
+            self.colour = colour
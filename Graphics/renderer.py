@@ -1,18 +1,197 @@
+import multiprocessing as _multiprocessing
+import struct as _struct
+from itertools import chain as _chain
+from multiprocessing import shared_memory as _shared_memory
+
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
+
 from PseudoEngine.Graphics.renderable import Renderable as _Renderable
 
+# Seconds between checks that the render process is still alive while waiting for a free slot
+_WAIT_INTERVAL = 0.1
+
+# x1, y1, x2, y2, style. The style indexes into a table of (value, colour) pairs shared with the render process
+_RECORD = _struct.Struct("<iiiii")
+
+
+def _identity(vertex_data):
+    return vertex_data
+
+
+def _default_fragment(renderable):
+    return renderable.char, renderable.colour
+
+
+def _render_process(window, memory_name, capacity, connection, free_slots):
+    """Draws the batches sent by a Renderer into the window and flushes it. Runs in the render process"""
+    memory = _shared_memory.SharedMemory(name=memory_name)
+    styles = []
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+
+            slot, count, new_styles, present = message
+            styles.extend(new_styles)
+
+            offset = slot * capacity * _RECORD.size
+            records = memory.buf[offset:offset + count * _RECORD.size]
+            try:
+                if _numpy is not None:
+                    batch = _numpy.frombuffer(records, dtype="<i4").reshape(count, 5)
+                    window.fillRects(batch[:, :4], batch[:, 4], styles)
+                    del batch
+                else:
+                    for x1, y1, x2, y2, style in _RECORD.iter_unpack(records):
+                        window.fillRect(x1, y1, x2, y2, *styles[style])
+            finally:
+                records.release()
+                # The slot is given back even when drawing failed, so the Renderer is never left waiting on it
+                free_slots.release()
+
+            if present:
+                window.flush()
+    finally:
+        memory.close()
+
 
 class Renderer:
     """This class is used to do all of the heavy lifting of the rendering. It is all done in a separate process"""
-    def __init__(self, vertex_shader, fragment_shader, window):
-        self.__vertex_shader = vertex_shader
-        self.__fragment_shader = fragment_shader
+    def __init__(self, vertex_shader, fragment_shader, window, capacity=65536):
+        """
+        Draw commands are packed into a batch as they are pushed. On flush the batch is copied into shared memory
+        and the render process draws it into its copy of the window, then flushes that to the screen.
+        Once handed to a Renderer, the window should only be drawn through the Renderer
+        :param vertex_shader: function applied to each renderable's vertex data, None leaves it unchanged
+        :param fragment_shader: function returning the (value, colour) a renderable is drawn with,
+                                None uses the renderable's char and colour
+        :type window: Window
+        :param capacity: most draw commands sent to the render process at once, larger batches are split
+        """
+        self.__vertex_shader = vertex_shader or _identity
+        self.__fragment_shader = fragment_shader or _default_fragment
         self.__window = window
+        self.__capacity = capacity
+        self.__process = None
+
+        self.__batch = bytearray(capacity * _RECORD.size)
+        self.__count = 0
+        self.__styles = {}
+        self.__new_styles = []
+        self.__slot = 0
+
+        # Two slots so a batch can be written while the render process draws the previous one
+        self.__memory = _shared_memory.SharedMemory(create=True, size=2 * capacity * _RECORD.size)
+        self.__free_slots = _multiprocessing.Semaphore(2)
+        child_connection, self.__connection = _multiprocessing.Pipe(duplex=False)
+        self.__process = _multiprocessing.Process(
+            target=_render_process, name="Render-Process", daemon=True,
+            args=(window, self.__memory.name, capacity, child_connection, self.__free_slots))
+        self.__process.start()
 
     def push(self, renderable):
-        pass
+        """Adds a renderable to the current frame. Vertex coordinates are truncated to whole cells"""
+        if not isinstance(renderable, _Renderable) or renderable._vertexData is None:
+            raise TypeError("'{}' has no vertex data to render".format(renderable.__class__.__name__))
+
+        index = self.__style_of(renderable)
+        x1, y1, x2, y2 = self.__vertex_shader(renderable._vertexData)
+        # Truncated like pushBatch does, so float positions draw the same through either
+        _RECORD.pack_into(self.__batch, self.__count * _RECORD.size, int(x1), int(y1), int(x2), int(y2), index)
+        self.__count += 1
+        if self.__count == self.__capacity:
+            self.__send(False)
+
+    def pushBatch(self, renderables):
+        """
+        Adds many renderables to the current frame. With numpy and no vertex shader,
+        the vertex data of the whole batch is packed into the frame as one array
+        """
+        if _numpy is None or self.__vertex_shader is not _identity:
+            for renderable in renderables:
+                self.push(renderable)
+            return
+
+        renderables = list(renderables)
+        for renderable in renderables:
+            if not isinstance(renderable, _Renderable) or renderable._vertexData is None:
+                raise TypeError("'{}' has no vertex data to render".format(renderable.__class__.__name__))
+
+        records = _numpy.empty((len(renderables), 5), dtype="<i4")
+        records[:, :4] = _numpy.fromiter(_chain.from_iterable(renderable._vertexData for renderable in renderables),
+                                         dtype="<i4", count=4 * len(renderables)).reshape(-1, 4)
+        records[:, 4] = [self.__style_of(renderable) for renderable in renderables]
+
+        batch = _numpy.frombuffer(self.__batch, dtype="<i4").reshape(self.__capacity, 5)
+        start = 0
+        while start < len(records):
+            count = min(len(records) - start, self.__capacity - self.__count)
+            batch[self.__count:self.__count + count] = records[start:start + count]
+            self.__count += count
+            start += count
+            if self.__count == self.__capacity:
+                self.__send(False)
+
+    def __style_of(self, renderable):
+        """:returns the index of the renderable's (value, colour) in the style table"""
+        style = self.__fragment_shader(renderable)
+        index = self.__styles.get(style)
+        if index is None:
+            index = self.__styles[style] = len(self.__styles)
+            self.__new_styles.append(style)
+        return index
 
     def flush(self):
-        pass
+        """Sends the current frame to the render process to be drawn and shown"""
+        self.__send(True)
 
     def clear(self):
-        pass
+        """Drops everything pushed since the last flush"""
+        self.__count = 0
+
+    def __send(self, present):
+        if self.__process is None:
+            raise RuntimeError("the Renderer is closed")
+        # Waits for the render process to finish with the slot, which only happens when it is two batches behind
+        while not self.__free_slots.acquire(timeout=_WAIT_INTERVAL):
+            if not self.__process.is_alive():
+                raise RuntimeError("the render process stopped (exit code {})".format(self.__process.exitcode))
+        size = self.__count * _RECORD.size
+        offset = self.__slot * self.__capacity * _RECORD.size
+        self.__memory.buf[offset:offset + size] = memoryview(self.__batch)[:size]
+
+        try:
+            self.__connection.send((self.__slot, self.__count, self.__new_styles, present))
+        except (BrokenPipeError, OSError):
+            raise RuntimeError("the render process stopped (exit code {})".format(self.__process.exitcode))
+        self.__new_styles = []
+        self.__count = 0
+        self.__slot ^= 1
+
+    def close(self):
+        """Stops the render process and frees the shared memory"""
+        if self.__process is None:
+            return
+        try:
+            self.__connection.send(None)
+        except (BrokenPipeError, OSError):
+            # The render process has already stopped
+            pass
+        self.__process.join()
+        self.__process = None
+        self.__connection.close()
+        self.__memory.close()
+        self.__memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
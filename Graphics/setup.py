@@ -5,10 +5,14 @@
 # information
 
 from ..utils.logger import Logger
+import ctypes as _ctypes
+import json as _json
 import re as _re
 import os as _os
 import platform as _platform
+import shutil as _shutil
 import subprocess as _subprocess
+import sys as _sys
 
 logger = Logger(__name__, Logger.ERROR, "graphics.log")
 
@@ -47,27 +51,27 @@ SYSTEM = _platform.system()
 
 _RE_HEX = _re.compile(r"\b0x[\da-fA-F]+\b")
 _reg_readable = None
+_is_setup = False
+
+# Probed values are kept here between runs, they are probed again when the platform version changes
+_CACHE_FILE = _os.path.join(_os.path.expanduser("~"), ".PseudoEngine", "setup.json")
 
 
 def CLEAR():
-    pass
+    _sys.stdout.write("\u001b[2J\u001b[H")
+    _sys.stdout.flush()
 
 
 def PAUSE():
     pass
 
 
-# Allows for colours to be used (for some reason...)
-_os.system("")
+_ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
 
 _version = _re.search(r"^\d+", _platform.version())
 _version = _version.group() if _version else False
 
 if SYSTEM == "Windows":
-    logger.info(SYSTEM)
-    # No Output
-    _os.system("@echo off")
-
     _CMD_MONITOR_DIMS = "wmic path Win32_VideoController get CurrentHorizontalResolution^,CurrentVerticalResolution /format:Value"
     _CMD_FONT_DIMS = "REG QUERY HKEY_CURRENT_USER\Console /v FontSize"
     _CMD_FONT_FACE = "REG QUERY HKEY_CURRENT_USER\Console /v FaceName"
@@ -78,12 +82,19 @@ if SYSTEM == "Windows":
     _RE_FACE_NAME = _re.compile("(?<=REG_SZ\s{4})[\w ]+")
 
 
-    def CLEAR():
-        _os.system("cls")
+    def PAUSE():
+        import msvcrt as _msvcrt
+        _msvcrt.getch()
 
 
-    def PAUSE():
-        _os.system("pause > nul")
+    def _enable_virtual_terminal():
+        """Turns on escape code processing (colours, cursor movement) for the console"""
+        kernel32 = _ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)
+        mode = _ctypes.c_ulong()
+        if not kernel32.GetConsoleMode(handle, _ctypes.byref(mode)) or \
+                not kernel32.SetConsoleMode(handle, mode.value | _ENABLE_VIRTUAL_TERMINAL_PROCESSING):
+            logger.error("Could not enable virtual terminal processing, colours may not work")
 
 
     if _version == "10":
@@ -92,7 +103,7 @@ if SYSTEM == "Windows":
     elif _version == "7":
         __offset = 0, 65
 else:
-    # For other platforms, ensure a command that stops output is called
+    # Other platforms are driven through ANSI escape codes, see terminal.AnsiDriver
     # Below code is technically superfluous but it stops the IDE from getting confused
     _CMD_MONITOR_DIMS = None
     _CMD_FONT_DIMS = None
@@ -102,8 +113,6 @@ else:
     _RE_HOR_REZ = None
     _RE_VER_REZ = None
     _RE_FACE_NAME = None
-    logger.critical("Platform ({}) is not yet supported".format(SYSTEM))
-    exit(-1)
 
 
 def _get_font_info():
@@ -169,7 +178,7 @@ def __screen_dims_mouse():
     while True:
         print("Right Click to exit.")
         print(maxPos)
-        _os.system("cls")
+        CLEAR()
 
         a = _mouse["pos"]
         if not a:
@@ -234,8 +243,75 @@ def _get_screen_info():
     __screen_dims = screen_dims
 
 
-def setup():
-    global _reg_readable
+def _cache_key():
+    """:returns the platform information the cached values are valid for"""
+    return {
+        "system": SYSTEM,
+        "release": _platform.release(),
+        "version": _platform.version(),
+        "machine": _platform.machine(),
+    }
+
+
+def _load_cache():
+    """Sets the probed values from the cache file. :returns True if the cache was valid for this platform"""
+    global __font_dims, __font_face, __screen_dims, __default_pos, __offset
+    try:
+        with open(_CACHE_FILE, "r") as cache_file:
+            cache = _json.load(cache_file)
+        if cache.get("platform") != _cache_key():
+            logger.info("Setup cache is for a different platform")
+            return False
+
+        __font_dims = tuple(cache["font_dims"])
+        __font_face = cache["font_face"]
+        __screen_dims = tuple(cache["screen_dims"])
+        __default_pos = tuple(cache["default_pos"])
+        __offset = tuple(cache["offset"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return True
+
+
+def _save_cache():
+    cache = {
+        "platform": _cache_key(),
+        "font_dims": __font_dims,
+        "font_face": __font_face,
+        "screen_dims": __screen_dims,
+        "default_pos": __default_pos,
+        "offset": __offset,
+    }
+    try:
+        _os.makedirs(_os.path.dirname(_CACHE_FILE), exist_ok=True)
+        with open(_CACHE_FILE, "w") as cache_file:
+            _json.dump(cache, cache_file)
+    except OSError as error:
+        logger.error("Could not write the setup cache: {}".format(error))
+
+
+def setup(refresh=False):
+    """
+    Gets the font, screen and window information, from the cache file when it is valid for this platform
+    :param refresh: probe the information again even if the cache is valid
+    """
+    global _reg_readable, _is_setup, __screen_dims
+    logger.info(SYSTEM)
+    if SYSTEM != "Windows":
+        # Nothing to probe, the screen is the terminal and its size is cheap to get
+        columns, lines = _shutil.get_terminal_size()
+        __screen_dims = columns * __font_dims[0], lines * __font_dims[1]
+        _is_setup = True
+        return
+
+    # Allows for colours to be used
+    _enable_virtual_terminal()
+    _is_setup = True
+
+    if not refresh and _load_cache():
+        logger.debug("Setup loaded from {}".format(_CACHE_FILE))
+        return
+
     if _subprocess.getstatusoutput(_CMD_FONT_DIMS)[0] != 0:
         logger.error("Cannot read registry(REG QUERY): USING DEFAULTS")
         print("Please change your default font to be Consolas 16 (or another 8 x 16 font)")
@@ -247,4 +323,11 @@ def setup():
     # Functions set the global variables inside
     _get_screen_info()
     _get_font_info()
-    _get_default_position()
\ No newline at end of file
+    _get_default_position()
+    _save_cache()
+
+
+def ensure_setup():
+    """Runs setup the first time it is called"""
+    if not _is_setup:
+        setup()
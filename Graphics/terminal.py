@@ -0,0 +1,229 @@
+# Author: Jacob Tsekrekos
+# Date: Oct 18, 2026
+# File: terminal.py
+# Description: Drivers that do the platform specific work of getting a frame onto a console
+import atexit as _atexit
+import ctypes as _ctypes
+import subprocess as _subprocess
+import sys as _sys
+
+from .setup import *
+
+try:
+    import fcntl as _fcntl
+    import struct as _struct
+    import termios as _termios
+except ImportError:
+    _fcntl = _struct = _termios = None
+
+_ALTERNATE_SCREEN = "\u001b[?1049h"
+_MAIN_SCREEN = "\u001b[?1049l"
+_HIDE_CURSOR = "\u001b[?25l"
+_SHOW_CURSOR = "\u001b[?25h"
+_CLEAR_SCREEN = "\u001b[2J\u001b[H"
+
+_STD_OUTPUT_HANDLE = -11
+
+if SYSTEM == "Windows":
+    from ctypes import wintypes as _wintypes
+
+    class _ConsoleScreenBufferInfo(_ctypes.Structure):
+        _fields_ = [("dwSize", _wintypes._COORD),
+                    ("dwCursorPosition", _wintypes._COORD),
+                    ("wAttributes", _wintypes.WORD),
+                    ("srWindow", _wintypes.SMALL_RECT),
+                    ("dwMaximumWindowSize", _wintypes._COORD)]
+
+
+class TerminalDriver:
+    """Base class for the consoles a Window draws to. Drivers must be picklable so a Renderer can use them"""
+    # Whether the platform setup (font and screen information) is needed before drawing
+    uses_console = True
+
+    def open(self):
+        """Called when a window starts using the driver"""
+        pass
+
+    def close(self):
+        """Called when a window stops using the driver, restores the console"""
+        pass
+
+    def size(self):
+        """:returns the (columns, lines) of the console, None if it is unknown"""
+        return None
+
+    def full_size(self):
+        """
+        :returns the (columns, lines) the console has when it fills the screen, None when the window has to work
+                 it out from the size of the monitor
+        """
+        return self.size()
+
+    def resize(self, columns, lines):
+        """Tries to set the size of the console. :returns an error message, empty if there was none"""
+        return ""
+
+    def clear(self):
+        raise NotImplementedError("{}.clear(self)".format(self.__class__.__name__))
+
+    def write(self, data):
+        raise NotImplementedError("{}.write(self, data)".format(self.__class__.__name__))
+
+
+class WindowsDriver(TerminalDriver):
+    """
+    Windows console, sized and cleared in process through the console API and escape codes.
+    mode con is only used when the console API can't resize the console
+    """
+    @staticmethod
+    def __console():
+        kernel32 = _ctypes.windll.kernel32
+        return kernel32, kernel32.GetStdHandle(_STD_OUTPUT_HANDLE)
+
+    def full_size(self):
+        # The console can be resized to fill the monitor, which is larger than its current size
+        return None
+
+    def size(self):
+        kernel32, handle = self.__console()
+        info = _ConsoleScreenBufferInfo()
+        if not kernel32.GetConsoleScreenBufferInfo(handle, _ctypes.byref(info)):
+            return None
+        window = info.srWindow
+        return window.Right - window.Left + 1, window.Bottom - window.Top + 1
+
+    def resize(self, columns, lines):
+        kernel32, handle = self.__console()
+        # The window has to fit inside the buffer after every call, so it is shrunk before the buffer is sized
+        kernel32.SetConsoleWindowInfo(handle, True, _ctypes.byref(_wintypes.SMALL_RECT(0, 0, 0, 0)))
+        if kernel32.SetConsoleScreenBufferSize(handle, _wintypes._COORD(columns, lines)) and \
+                kernel32.SetConsoleWindowInfo(handle, True,
+                                              _ctypes.byref(_wintypes.SMALL_RECT(0, 0, columns - 1, lines - 1))):
+            return ""
+        return _subprocess.getoutput(CMD_SET_SIZE.format(columns, lines))
+
+    def clear(self):
+        self.write(_CLEAR_SCREEN)
+
+    def write(self, data):
+        _sys.stdout.write(data)
+        _sys.stdout.flush()
+
+
+class AnsiDriver(TerminalDriver):
+    """
+    Terminals that understand ANSI escape codes (Linux, macOS). Draws on the alternate screen with the cursor
+    hidden and input echo turned off, all of which are restored on close. They are also restored when the program
+    exits without closing, and before the traceback of an uncaught exception is printed so it stays readable
+    """
+    def __init__(self):
+        self.__saved_mode = None
+        self.__is_open = False
+        self.__excepthook = None
+
+    def __getstate__(self):
+        # The exception hook only belongs to the process that opened the driver
+        state = self.__dict__.copy()
+        state["_AnsiDriver__excepthook"] = None
+        return state
+
+    def __on_exception(self, exc_type, exc_val, exc_tb):
+        hook = self.__excepthook or _sys.__excepthook__
+        self.close()
+        hook(exc_type, exc_val, exc_tb)
+
+    def open(self):
+        if self.__is_open:
+            return
+        self.__is_open = True
+        if _termios is not None and _sys.stdin.isatty():
+            fd = _sys.stdin.fileno()
+            self.__saved_mode = _termios.tcgetattr(fd)
+            mode = _termios.tcgetattr(fd)
+            mode[3] &= ~(_termios.ECHO | _termios.ICANON)
+            _termios.tcsetattr(fd, _termios.TCSANOW, mode)
+        self.write(_ALTERNATE_SCREEN + _HIDE_CURSOR)
+        _atexit.register(self.close)
+        self.__excepthook = _sys.excepthook
+        _sys.excepthook = self.__on_exception
+
+    def close(self):
+        if not self.__is_open:
+            return
+        self.__is_open = False
+        _atexit.unregister(self.close)
+        # Another hook may have been put in front of this one since, which then keeps calling it
+        if self.__excepthook is not None and _sys.excepthook == self.__on_exception:
+            _sys.excepthook = self.__excepthook
+        self.__excepthook = None
+        self.write(_SHOW_CURSOR + _MAIN_SCREEN)
+        if self.__saved_mode is not None:
+            _termios.tcsetattr(_sys.stdin.fileno(), _termios.TCSANOW, self.__saved_mode)
+            self.__saved_mode = None
+
+    def size(self):
+        if _fcntl is None or not _sys.stdout.isatty():
+            return None
+        try:
+            lines, columns, _, _ = _struct.unpack("HHHH", _fcntl.ioctl(_sys.stdout.fileno(), _termios.TIOCGWINSZ,
+                                                                       bytes(8)))
+        except OSError:
+            return None
+        # Pseudo terminals report 0 x 0 until their size is set
+        if not columns or not lines:
+            return None
+        return columns, lines
+
+    def clear(self):
+        self.write(_CLEAR_SCREEN)
+
+    def write(self, data):
+        _sys.stdout.write(data)
+        _sys.stdout.flush()
+
+
+class HeadlessDriver(TerminalDriver):
+    """In memory console for benchmarking and testing the render path without a terminal"""
+    uses_console = False
+
+    def __init__(self, columns=80, lines=25, keep_output=False):
+        """
+        :param keep_output: keep every write in output, otherwise only the last one is kept
+        """
+        self.__size = columns, lines
+        self.keep_output = keep_output
+        self.output = []
+        self.last_write = ""
+        self.writes = 0
+        self.bytes_written = 0
+        self.clears = 0
+
+    def size(self):
+        return self.__size
+
+    def resize(self, columns, lines):
+        self.__size = columns, lines
+        return ""
+
+    def clear(self):
+        self.clears += 1
+
+    def write(self, data):
+        self.writes += 1
+        self.bytes_written += len(data.encode())
+        self.last_write = data
+        if self.keep_output:
+            self.output.append(data)
+
+    def reset(self):
+        """Sets the counters back to 0 and drops the kept output"""
+        self.output = []
+        self.last_write = ""
+        self.writes = self.bytes_written = self.clears = 0
+
+
+def default_driver():
+    """:returns the driver for the console of the current platform"""
+    if SYSTEM == "Windows":
+        return WindowsDriver()
+    return AnsiDriver()
@@ -2,85 +2,316 @@
 # Date: Jun 13, 2018
 # File: window.py
 # Description: Main window class, does all back-end to get a console to act like a window
-import subprocess as _subprocess
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
 
+from ..enums import Align as _Align
 from ..enums import Colour as _Colour
+from ..enums import Cursor as _Cursor
+from ..utils.timing import RollingStats as _RollingStats
 from .setup import *
+from .terminal import default_driver as _default_driver
 import time
 
 logger.name = __name__
 logger.setLevel(Logger.ERROR)
 
-setup()
-
-# implement a content update (25 frames/second) that only affects graphics
-# todo: add an update method that run when the window is "started"
-# update tries to update the screen at a fixed rate
-# This means that a new buffer may be needed to hold the current screen?
+# Unchanged cells between two changed runs are re-sent instead of moving the cursor when the gap is this small
+_DIFF_GAP = 4
+# Window.run sleeps until this many seconds are left before the next update and yields the rest of the time
+_SLEEP_MARGIN = 0.002
 
 
 class Window:
-    def __init__(self, width, height):
+    def __init__(self, width, height, double_buffered=True, auto_clear=True, driver=None):
         """
         Sets console's height and width based on the font size.
         Stores the width and height in order to draw later
+        :param double_buffered: keep the last presented frame and only write the cells that changed on flush
+        :param auto_clear: clear the pixels after every flush, otherwise they stay until overwritten or cleared
+        :type driver: TerminalDriver    :param driver: console the window draws to, None uses the platform's console
         """
+        self.driver = driver if driver is not None else _default_driver()
+        if self.driver.uses_console:
+            ensure_setup()
+        self.driver.open()
         self.font_dims = FONT_DIMS()
 
         self.width = None
         self.height = None
+        self.double_buffered = double_buffered
+        self.auto_clear = auto_clear
 
-        # X: {Y: value)
-        self.__coords = None
-        self.resize(width, height)
-        self.__background_tile = " "
+        # Row major framebuffer, cell (x, y) is at index y * width + x. A value of None is a background tile
+        self.__chars = None
+        self.__colours = None
+        self.__blank_chars = None
+        self.__blank_colours = None
+        # Copy of the framebuffer that is currently on the screen, None when the screen has to be fully redrawn
+        self.__front = None
         self.__background = None
+        self.__background_colour = ""
+        # Set whenever something is drawn, Window.run only flushes dirty windows
+        self.__dirty = True
+        # Per row (inclusive) x spans that may differ from the screen, and spans drawn to since the last clear
+        self.__dirty_left = self.__dirty_right = None
+        self.__used_left = self.__used_right = None
+        # Amount of cells that were compared and recomposed by the last flush
+        self.recomposed_cells = 0
+        self.resize(width, height)
+
+        self.__running = False
+        self.frame_times = _RollingStats()
+        self.update_times = _RollingStats()
+        self.flush_times = _RollingStats()
+        self.dropped_frames = 0
 
     def fullScreen(self):
         """Takes the width and height of the screen in pixels and divides by the font dims to get a columns and rows.
         columns and rows are sent to the resize function"""
-        dims = [i - j for i, j in zip(SCREEN_DIMS(), OFFSET())]
-        self.resize(*dims)
+        size = self.driver.full_size()
+        if size is None:
+            self.resize(*[i - j for i, j in zip(SCREEN_DIMS(), OFFSET())])
+        else:
+            # The console already has this size, resizing it would add the extra lines again on every call
+            self.__set_size(*size)
+
+    def close(self):
+        """Gives the console back, e.g. leaves the alternate screen of an ANSI terminal"""
+        self.driver.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def resize(self, width, height):
         """ Sets the size of the console """
         cols = width // self.font_dims[0]
         lines = height // self.font_dims[1]
         # add in getstatusoutput to log errors more effectively?
-        error = _subprocess.getoutput(CMD_SET_SIZE.format(cols, lines + 2))
+        error = self.driver.resize(cols, lines + 2)
         if error:
             logger.error(error)
+        self.__set_size(cols, lines)
 
+    def __set_size(self, cols, lines):
+        """Sizes the framebuffer for a console of cols x lines"""
         # Accounts for the indexing of the list starting at 0 and going to length - 1, width -1
-        self.width, self.height = cols - 1, lines - 1
-        self.__coords = {i: [] for i in range(self.height)}
+        self.width, self.height = max(0, cols - 1), max(0, lines - 1)
+
+        size = self.width * self.height
+        self.__blank_chars = [None] * size
+        self.__blank_colours = [""] * size
+        self.__chars = self.__blank_chars[:]
+        self.__colours = self.__blank_colours[:]
+        self.__front = None
+        self.__dirty = True
+        self.__dirty_left, self.__dirty_right = [self.width] * self.height, [-1] * self.height
+        self.__used_left, self.__used_right = [self.width] * self.height, [-1] * self.height
+
+    def __mark(self, top, bottom, left, right):
+        """Marks the (inclusive) rectangle as drawn to"""
+        dirty_left, dirty_right = self.__dirty_left, self.__dirty_right
+        used_left, used_right = self.__used_left, self.__used_right
+        for y in range(top, bottom + 1):
+            if left < dirty_left[y]:
+                dirty_left[y] = left
+            if right > dirty_right[y]:
+                dirty_right[y] = right
+            if left < used_left[y]:
+                used_left[y] = left
+            if right > used_right[y]:
+                used_right[y] = right
+        self.__dirty = True
+
+    def clear(self):
+        """Resets every pixel that was drawn to since the last clear back to the background"""
+        used_left, used_right = self.__used_left, self.__used_right
+        for y in range(self.height):
+            if used_right[y] < 0:
+                continue
+            start, stop = y * self.width + used_left[y], y * self.width + used_right[y] + 1
+            self.__chars[start:stop] = self.__blank_chars[:stop - start]
+            self.__colours[start:stop] = self.__blank_colours[:stop - start]
+            self.__dirty = True
+
+            if used_left[y] < self.__dirty_left[y]:
+                self.__dirty_left[y] = used_left[y]
+            if used_right[y] > self.__dirty_right[y]:
+                self.__dirty_right[y] = used_right[y]
+            used_left[y], used_right[y] = self.width, -1
+
+    def run(self, update, fps=25, max_updates=5, frames=None):
+        """
+        Calls update at a fixed rate and flushes the window after the updates of each frame if anything was drawn.
+        Time between updates is slept away. When update falls behind by more than max_updates steps,
+        the missed steps are dropped (and counted in dropped_frames) instead of being caught up on
+        :param update: function called with the time step in seconds, returning False stops the loop
+        :param fps: amount of updates per second
+        :param max_updates: most updates that are run before the window is flushed
+        :param frames: stop after this many flushes, None runs until stop is called
+        :returns: None
+        """
+        step = 1 / fps
+        clock = time.perf_counter
+        self.__running = True
+
+        lag = 0.0
+        flushed = 0
+        previous = clock()
+        while self.__running:
+            frame_start = clock()
+            self.frame_times.add(frame_start - previous)
+            lag += frame_start - previous
+            previous = frame_start
+
+            updates = 0
+            while lag >= step and self.__running:
+                start = clock()
+                if update(step) is False:
+                    self.__running = False
+                self.update_times.add(clock() - start)
+                lag -= step
+                updates += 1
+
+                if updates >= max_updates and lag >= step:
+                    self.dropped_frames += int(lag // step)
+                    lag %= step
+                    break
+
+            if updates and self.__dirty:
+                start = clock()
+                self.flush()
+                self.flush_times.add(clock() - start)
+                flushed += 1
+                if frames is not None and flushed >= frames:
+                    self.__running = False
+
+            if self.__running:
+                self.__sleep(frame_start + step - lag - clock())
+
+    @staticmethod
+    def __sleep(seconds):
+        """Sleeps for most of the time and yields the processor for the last _SLEEP_MARGIN seconds"""
+        end = time.perf_counter() + seconds
+        if seconds > _SLEEP_MARGIN:
+            time.sleep(seconds - _SLEEP_MARGIN)
+        while time.perf_counter() < end:
+            time.sleep(0)
+
+    def stop(self):
+        """Stops Window.run after the current frame"""
+        self.__running = False
+
+    def stats(self):
+        """:returns the frame, update and flush time percentiles (in seconds) of the most recent frames"""
+        return {
+            "frame": self.frame_times.summary(),
+            "update": self.update_times.summary(),
+            "flush": self.flush_times.summary(),
+            "dropped": self.dropped_frames,
+            "recomposed": self.recomposed_cells,
+        }
 
     def flush(self):
         """ Flushes the pixels to the screen. Does this by setting a default of the background_tile
-        and goes through the list of all pixels and adds to the screen if it exists"""
+        and goes through the list of all pixels and adds to the screen if it exists.
+        When double buffered, only the cells that differ from the last presented frame are written"""
+        if self.double_buffered and self.__front is not None:
+            out = self.__diff()
+        else:
+            # The screen clear is only needed when nothing is known about what is currently displayed
+            self.driver.clear()
+            out = self.__redraw()
+            self.recomposed_cells = self.width * self.height
+            self.__front = self.__chars[:], self.__colours[:]
+        self.__dirty_left[:] = [self.width] * self.height
+        self.__dirty_right[:] = [-1] * self.height
+
+        if out:
+            self.driver.write(_Colour.RESET + out + _Colour.RESET + _Cursor.move(0, self.height))
+        self.__dirty = False
+        # Clearing what was drawn makes the window dirty again, so the erased cells are shown by the next flush
+        if self.auto_clear:
+            self.clear()
 
-        # Note a screen clear is not necessary because each element in the current buffer is already being written to
-        # however this causes the screen to occasionally "jump" whereas the screen clear causes it to flicker...
-        # Find a way to fix this???
-        CLEAR()
+    def __compose(self, start, stop, state):
+        """
+        Builds the output string for the framebuffer cells in [start, stop).
+        A colour escape is only written when it differs from the colour the terminal is already using
+        :param state: colour currently set on the terminal, "" after a reset and None when unknown
+        :returns: the output string and the colour set on the terminal after it is written
+        """
+        background = self.__background_colour
+        parts = []
+        append = parts.append
+        for char, colour in zip(self.__chars[start:stop], self.__colours[start:stop]):
+            if char is None:
+                char, colour = " ", background
+            if colour != state:
+                append(_Colour.RESET + colour)
+                state = colour
+            append(char)
+            # Values longer than one character carry their own escape codes
+            if len(char) > 1:
+                state = None
+        return "".join(parts), state
 
-        out = ""
+    def __redraw(self):
+        """Builds the output for every row of the framebuffer"""
+        out = []
+        state = ""
         for y in range(self.height):
-            row = self.__coords.get(y, [])
-
-            line = ""
-            # print(y, row)
-            for x in range(self.width):
-                if not row:
-                    line += self.__background_tile
-                elif row[0][0] == x:
-                    line += _Colour.RESET + row[0][1]
-                    row.pop(0)
-                else:
-                    line += self.__background_tile
-            out += line + _Colour.RESET + "\n"
-            self.__coords[y] = []
-        print(_Colour.RESET + out + _Colour.RESET)
+            line, state = self.__compose(y * self.width, (y + 1) * self.width, state)
+            out.append(line)
+            if state != "":
+                out.append(_Colour.RESET)
+                state = ""
+            out.append("\n")
+        return "".join(out)
+
+    def __diff(self):
+        """
+        Builds the cursor moves and changed runs needed to turn the front frame into the back frame.
+        Only the dirty span of each row is compared, and is copied into the front frame afterwards
+        """
+        front_chars, front_colours = self.__front
+        out = []
+        state = ""
+        self.recomposed_cells = 0
+        for y in range(self.height):
+            if self.__dirty_right[y] < 0:
+                continue
+            row_start = y * self.width + self.__dirty_left[y]
+            row_end = y * self.width + self.__dirty_right[y] + 1
+            self.recomposed_cells += row_end - row_start
+
+            chars, colours = self.__chars[row_start:row_end], self.__colours[row_start:row_end]
+            old_chars, old_colours = front_chars[row_start:row_end], front_colours[row_start:row_end]
+            if chars == old_chars and colours == old_colours:
+                continue
+            front_chars[row_start:row_end] = chars
+            front_colours[row_start:row_end] = colours
+
+            x, end = 0, len(chars)
+            while x < end:
+                if chars[x] == old_chars[x] and colours[x] == old_colours[x]:
+                    x += 1
+                    continue
+
+                start = last = x
+                while x < end and x - last <= _DIFF_GAP:
+                    if chars[x] != old_chars[x] or colours[x] != old_colours[x]:
+                        last = x
+                    x += 1
+                run, state = self.__compose(row_start + start, row_start + last + 1, state)
+                out.append(_Cursor.move(row_start + start - y * self.width, y) + run)
+                x = last + 1
+        return "".join(out)
 
     @property
     def background(self):
@@ -89,35 +320,177 @@ class Window:
     @background.setter
     def background(self, colour):
         self.__background = colour
-        self.__background_tile = colour + " " + _Colour.RESET
+        self.__background_colour = colour or ""
+        self.__dirty = True
+        # Background tiles are not stored in the framebuffer, so the diff would not see this change
+        self.__front = None
 
-    def setPixel(self, x, y, value):
-        if y not in range(0, self.height):
+    def setPixel(self, x, y, value, colour=""):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = y * self.width + x
+            self.__chars[index] = value
+            self.__colours[index] = colour
+            self.__dirty = True
+
+            if x < self.__dirty_left[y]:
+                self.__dirty_left[y] = x
+            if x > self.__dirty_right[y]:
+                self.__dirty_right[y] = x
+            if x < self.__used_left[y]:
+                self.__used_left[y] = x
+            if x > self.__used_right[y]:
+                self.__used_right[y] = x
+
+    def fillRect(self, x1, y1, x2, y2, value, colour=""):
+        """
+        Sets every pixel in the rectangle between the two corners (inclusive), clipped to the window
+        :returns: None
+        """
+        left, right = max(0, min(x1, x2)), min(self.width - 1, max(x1, x2))
+        top, bottom = max(0, min(y1, y2)), min(self.height - 1, max(y1, y2))
+        if left > right or top > bottom:
             return None
-        for i, coord in enumerate(self.__coords[y]):
-            if coord[0] > x:
-                self.__coords[y].insert(i, (x, value))
-                break
-            elif coord[0] == x:
-                self.__coords[y][i] = (x, value)
-                break
-        else:
-            self.__coords[y].append((x, value))
+
+        values = [value] * (right - left + 1)
+        colours = [colour] * (right - left + 1)
+        for y in range(top, bottom + 1):
+            start = y * self.width + left
+            self.__chars[start:start + len(values)] = values
+            self.__colours[start:start + len(values)] = colours
+        self.__mark(top, bottom, left, right)
+
+    def fillRects(self, rects, styles, palette):
+        """
+        Fills many rectangles at once, later rectangles are drawn over earlier ones.
+        With numpy the clipping and filling is vectorised, otherwise each rectangle goes through fillRect
+        :param rects: sequence or (n, 4) array of the two corners (x1, y1, x2, y2) of each rectangle (inclusive)
+        :param styles: sequence of n indexes into the palette
+        :param palette: list of the (value, colour) pairs the rectangles are drawn with
+        :returns: None
+        """
+        if _numpy is None:
+            for (x1, y1, x2, y2), style in zip(rects, styles):
+                self.fillRect(x1, y1, x2, y2, *palette[style])
+            return None
+
+        rects = _numpy.asarray(rects, dtype=_numpy.int64).reshape(-1, 4)
+        styles = _numpy.asarray(styles, dtype=_numpy.int64)
+        left = _numpy.maximum(_numpy.minimum(rects[:, 0], rects[:, 2]), 0)
+        right = _numpy.minimum(_numpy.maximum(rects[:, 0], rects[:, 2]), self.width - 1)
+        top = _numpy.maximum(_numpy.minimum(rects[:, 1], rects[:, 3]), 0)
+        bottom = _numpy.minimum(_numpy.maximum(rects[:, 1], rects[:, 3]), self.height - 1)
+
+        visible = _numpy.flatnonzero((left <= right) & (top <= bottom))
+        if not len(visible):
+            return None
+        left, right, top, bottom = left[visible], right[visible], top[visible], bottom[visible]
+
+        # Expand every rectangle into the framebuffer indexes it covers
+        widths = right - left + 1
+        areas = widths * (bottom - top + 1)
+        owners = _numpy.repeat(_numpy.arange(len(visible)), areas)
+        offsets = _numpy.arange(len(owners)) - _numpy.repeat(_numpy.cumsum(areas) - areas, areas)
+        cells = (top[owners] + offsets // widths[owners]) * self.width + left[owners] + offsets % widths[owners]
+
+        # Only the rows between the first and last covered row are converted to and from arrays
+        first, last = int(top.min()) * self.width, (int(bottom.max()) + 1) * self.width
+        cells -= first
+        topmost = _numpy.full(last - first, -1, dtype=_numpy.int64)
+        _numpy.maximum.at(topmost, cells, owners)
+        covered = _numpy.flatnonzero(topmost >= 0)
+        cell_styles = styles[visible][topmost[covered]]
+
+        values = _numpy.empty(len(palette), dtype=object)
+        values[:] = [value for value, colour in palette]
+        colours = _numpy.empty(len(palette), dtype=object)
+        colours[:] = [colour for value, colour in palette]
+
+        chars = _numpy.empty(last - first, dtype=object)
+        chars[:] = self.__chars[first:last]
+        chars[covered] = values[cell_styles]
+        self.__chars[first:last] = chars.tolist()
+
+        chars[:] = self.__colours[first:last]
+        chars[covered] = colours[cell_styles]
+        self.__colours[first:last] = chars.tolist()
+
+        # covered is sorted, so the first and last covered cell of each row give its span
+        rows, firsts = _numpy.unique(covered // self.width, return_index=True)
+        lasts = _numpy.append(firsts[1:], len(covered)) - 1
+        top = first // self.width
+        for row, left, right in zip(rows.tolist(), (covered[firsts] % self.width).tolist(),
+                                    (covered[lasts] % self.width).tolist()):
+            self.__mark(top + row, top + row, left, right)
 
     def pushMatrix(self, matrix, x=0, y=0):
         """
+        Copies a matrix (or a view of one) into the window, clipped to the window
         :param x: x offset
         :param y: y offset
         :type matrix: Matrix
         :returns: None
         """
-        for i in range(matrix.rows):
-            for j in range(matrix.columns):
-                self.setPixel(i + x, j + y, matrix[i][j])
+        # Each of the matrix's rows is a column on the screen, written with one strided slice assignment
+        first, last = max(0, -y), min(matrix.columns, self.height - y)
+        if first >= last:
+            return None
+
+        left, right = max(0, x), min(matrix.rows, self.width - x) + x - 1
+        if left > right:
+            return None
+
+        for i in range(max(0, -x), min(matrix.rows, self.width - x)):
+            start = (y + first) * self.width + x + i
+            stop = (y + last - 1) * self.width + x + i + 1
+            self.__chars[start:stop:self.width] = matrix.segment(i, first, last)
+            self.__colours[start:stop:self.width] = self.__blank_colours[:last - first]
+        self.__mark(y + first, y + last - 1, left, right)
+
+    def blitRow(self, x, y, cells, colour=""):
+        """
+        Writes a run of cells into one row of the window, clipped to the window
+        :param cells: str or sequence of values, one per cell
+        :param colour: colour of the whole run, or a sequence with the colour of each cell
+        :raises ValueError: when a sequence of colours is not the same length as cells
+        :returns: None
+        """
+        if not isinstance(colour, str) and len(colour) != len(cells):
+            raise ValueError("blitRow got {} colours for {} cells".format(len(colour), len(cells)))
+        if not 0 <= y < self.height:
+            return None
+        first, last = max(0, -x), min(len(cells), self.width - x)
+        if first >= last:
+            return None
+
+        start = y * self.width + x + first
+        self.__chars[start:start + last - first] = cells[first:last]
+        if isinstance(colour, str):
+            self.__colours[start:start + last - first] = [colour] * (last - first)
+        else:
+            self.__colours[start:start + last - first] = colour[first:last]
+        self.__mark(y, y, x + first, x + last - 1)
+
+    def drawText(self, x, y, text, colour="", align=_Align.LEFT, width=None):
+        """
+        Writes a string into one row of the window
+        :param align: Align enum. Without a width, LEFT starts the text at x, RIGHT ends it at x and CENTRE centres it on x
+        :param width: aligns the text within the width cells starting at x, text that does not fit is cut off
+        :returns: None
+        """
+        if width is not None:
+            text = text[:width]
+            if align == _Align.RIGHT:
+                x += width - len(text)
+            elif align == _Align.CENTRE:
+                x += (width - len(text)) // 2
+        elif align == _Align.RIGHT:
+            x -= len(text) - 1
+        elif align == _Align.CENTRE:
+            x -= len(text) // 2
+        self.blitRow(x, y, text, colour)
 
     def addText(self, x, y, text):
-        for letter in text:
-            self.setPixel(x, y, letter)
+        self.drawText(x, y, text)
 
     @staticmethod
     def SetLogLevel(enum):
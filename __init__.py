@@ -1,8 +1,39 @@
 # Dependencies: pynput, Pillow and all other associated package dependancies
-from .DeviceInput import *
-from .Graphics import Window
-from .utils.logger import Logger
-from . import enums
-from . import evf
-from .matrix import Matrix
-from .engine_math import Vec2, Vec3
+# Submodules are imported the first time one of their names is used, so importing the engine has no side effects
+import importlib as _importlib
+
+# name: (module, attribute), an attribute of None is the module itself
+_LAZY = {
+    "Window": (".Graphics", "Window"),
+    "Logger": (".utils.logger", "Logger"),
+    "enums": (".enums", None),
+    "evf": (".evf", None),
+    "Matrix": (".matrix", "Matrix"),
+    "Vec2": (".engine_math", "Vec2"),
+    "Vec3": (".engine_math", "Vec3"),
+}
+# Subpackages and modules that importing the names above used to make available
+for _name in ("DeviceInput", "Graphics", "utils", "matrix", "engine_math"):
+    _LAZY[_name] = ("." + _name, None)
+for _name in ("UpdateChecker", "keys", "mouse", "gamepad", "keyboard_handler", "mouse_handler", "gamepad_handler",
+              "ButtonCode", "KeyCode", "XCode", "Event", "Dispatcher", "drain", "events"):
+    _LAZY[_name] = (".DeviceInput", _name)
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    try:
+        module, attribute = _LAZY[name]
+    except KeyError:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+    value = _importlib.import_module(module, __name__)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
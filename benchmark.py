@@ -0,0 +1,205 @@
+# Author: Jacob Tsekrekos
+# Date: Oct 18, 2026
+# File: benchmark.py
+# Description: Benchmarks of the render path on the headless console, run with python -m PseudoEngine.benchmark
+import argparse as _argparse
+import json as _json
+import random as _random
+import sys as _sys
+import time as _time
+
+from .Graphics.setup import FONT_DIMS as _FONT_DIMS
+from .Graphics.terminal import HeadlessDriver as _HeadlessDriver
+from .Graphics.window import Window as _Window
+from .enums import Colour as _Colour
+from .matrix import Matrix as _Matrix
+from .utils.timing import RollingStats as _RollingStats
+
+_CHARS = "#@%&*+=-:.oOxX"
+_TEXT = "The quick brown fox jumps over the lazy dog. "
+
+
+def _make_window(columns, lines, **kwargs):
+    """:returns a window of columns x lines cells drawing to a headless console"""
+    font_width, font_height = _FONT_DIMS()
+    # Windows keep one less cell than the console in each direction
+    return _Window((columns + 1) * font_width, (lines + 1) * font_height, driver=_HeadlessDriver(), **kwargs)
+
+
+def _foreground(rng):
+    return _Colour.join(_Colour.FOREGROUND, rng.randrange(256))
+
+
+# Scenes take the window and a seeded random.Random and return a function that draws frame n
+def _scene_empty(window, rng):
+    def draw(n):
+        pass
+    return draw
+
+
+def _scene_random_fill(window, rng):
+    # Pre-generated so the scene measures the window and not the random number generator
+    frames = [[(rng.choice(_CHARS), _foreground(rng)) for _ in range(window.width * window.height)]
+              for _ in range(8)]
+
+    def draw(n):
+        cells = iter(frames[n % len(frames)])
+        for y in range(window.height):
+            for x in range(window.width):
+                char, colour = next(cells)
+                window.setPixel(x, y, char, colour)
+    return draw
+
+
+def _scene_scrolling_text(window, rng):
+    lines = [(_TEXT * (window.width // len(_TEXT) + 2))[i:] for i in range(len(_TEXT))]
+    colours = [_foreground(rng) for _ in range(8)]
+
+    def draw(n):
+        for y in range(window.height):
+            window.drawText(0, y, lines[(y + n) % len(lines)], colours[y % len(colours)], width=window.width)
+    return draw
+
+
+def _scene_sprite_storm(window, rng, count=200):
+    sprites = []
+    for _ in range(count):
+        sprite = _Matrix(rng.randint(2, 5), rng.randint(2, 4), rng.choice(_CHARS))
+        sprites.append([sprite, rng.randrange(window.width), rng.randrange(window.height),
+                        rng.choice((-1, 1)), rng.choice((-1, 1))])
+
+    def draw(n):
+        for state in sprites:
+            sprite, x, y, dx, dy = state
+            if not 0 <= x + dx < window.width - sprite.rows:
+                dx = -dx
+            if not 0 <= y + dy < window.height - sprite.columns:
+                dy = -dy
+            state[1:] = x + dx, y + dy, dx, dy
+            window.pushMatrix(sprite, x + dx, y + dy)
+    return draw
+
+
+def _scene_coloured_background(window, rng):
+    backgrounds = [_Colour.B_BLUE, _Colour.B_BLACK, _Colour.B_CYAN, _Colour.B_MAGENTA]
+    colours = [_foreground(rng) for _ in range(16)]
+
+    def draw(n):
+        # The background changes every 30 frames, forcing a full redraw
+        if n % 30 == 0:
+            window.background = backgrounds[n // 30 % len(backgrounds)]
+        for y in range(window.height):
+            x = (n + y) % window.width
+            window.fillRect(x, y, x + 8, y, "~", colours[(n + y) % len(colours)])
+    return draw
+
+
+SCENES = {
+    "empty": _scene_empty,
+    "random_fill": _scene_random_fill,
+    "scrolling_text": _scene_scrolling_text,
+    "sprite_storm": _scene_sprite_storm,
+    "coloured_background": _scene_coloured_background,
+}
+
+
+def run_scene(name, frames=300, columns=120, lines=40, seed=0, double_buffered=True):
+    """
+    Draws and flushes frames of a scene on a headless window
+    :returns a dict with the frames per second, bytes written per frame and frame time percentiles (in ms)
+    """
+    window = _make_window(columns, lines, double_buffered=double_buffered)
+    draw = SCENES[name](window, _random.Random(seed))
+    driver = window.driver
+    frame_times = _RollingStats(frames)
+    frame_bytes = _RollingStats(frames)
+
+    total = 0
+    for n in range(frames):
+        written = driver.bytes_written
+        start = _time.perf_counter()
+        draw(n)
+        window.flush()
+        elapsed = _time.perf_counter() - start
+        total += elapsed
+        frame_times.add(elapsed * 1000)
+        frame_bytes.add(driver.bytes_written - written)
+    window.close()
+
+    times = frame_times.summary((50, 99))
+    sizes = frame_bytes.summary((50, 99))
+    return {
+        "frames": frames,
+        "fps": frames / total if total else None,
+        "bytes_per_frame": sizes["mean"],
+        "bytes_p99": sizes["p99"],
+        "frame_ms_p50": times["p50"],
+        "frame_ms_p99": times["p99"],
+    }
+
+
+def _ops_per_second(op, count):
+    """:returns how many times per second op(i) runs, op is called count times"""
+    start = _time.perf_counter()
+    for i in range(count):
+        op(i)
+    elapsed = _time.perf_counter() - start
+    return count / elapsed if elapsed else None
+
+
+def run_operations(count=100000, columns=120, lines=40):
+    """:returns the calls per second of the individual drawing operations"""
+    window = _make_window(columns, lines)
+    width, height = window.width, window.height
+    sprite = _Matrix(4, 3, "#")
+    canvas = _Matrix(columns, lines)
+    colour = _Colour.join(_Colour.FOREGROUND, 34)
+
+    results = {
+        "setPixel": _ops_per_second(lambda i: window.setPixel(i % width, i // width % height, "#", colour), count),
+        "pushMatrix": _ops_per_second(lambda i: window.pushMatrix(sprite, i % width, i % height), count // 10),
+        "Matrix.writeMatrix": _ops_per_second(lambda i: canvas.writeMatrix(sprite, i % columns, i % lines), count // 10),
+        "Colour.join": _ops_per_second(lambda i: _Colour.join(_Colour.FOREGROUND, i & 255), count),
+    }
+    # Every cell is drawn before a flush so it measures a full frame of changes
+    window.flush()
+
+    def flush(i):
+        window.fillRect(0, 0, width, height, _CHARS[i % len(_CHARS)], colour)
+        window.flush()
+    results["flush"] = _ops_per_second(flush, max(1, count // 1000))
+    window.close()
+    return results
+
+
+def run(scenes=None, frames=300, columns=120, lines=40, seed=0, count=100000):
+    """:returns the results of the scenes (all when None) and the operations, as a dict"""
+    return {
+        "config": {"frames": frames, "columns": columns, "lines": lines, "seed": seed, "count": count,
+                   "python": _sys.version.split()[0]},
+        "scenes": {name: run_scene(name, frames, columns, lines, seed) for name in (scenes or SCENES)},
+        "operations": run_operations(count, columns, lines),
+    }
+
+
+def main(argv=None):
+    parser = _argparse.ArgumentParser(description="Benchmarks the PseudoEngine render path")
+    parser.add_argument("--scene", action="append", choices=sorted(SCENES), help="scene to run, may be repeated")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--columns", type=int, default=120)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=100000, help="calls per operation benchmark")
+    parser.add_argument("--output", help="file the JSON is written to, stdout when not given")
+    args = parser.parse_args(argv)
+
+    results = _json.dumps(run(args.scene, args.frames, args.columns, args.lines, args.seed, args.count), indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
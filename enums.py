@@ -12,6 +12,12 @@ class Logging:
     CRITICAL = 50
 
 
+class Align:
+    LEFT = 0
+    CENTRE = 1
+    RIGHT = 2
+
+
 # http://www.lihaoyi.com/post/BuildyourownCommandLinewithANSIescapecodes.html
 # todo add RGB/RGBA Translation
 class Colour:
@@ -38,6 +44,13 @@ class Colour:
         return "\u001b[{}{}m".format(place, colour)
 
 
+class Cursor:
+    @staticmethod
+    def move(x, y):
+        """Moves the cursor to column x, row y (both starting at 0)"""
+        return "\u001b[{};{}H".format(y + 1, x + 1)
+
+
 if __name__ == "__main__":
     print(Colour.B_CYAN + Colour.join(Colour.FOREGROUND, 34) + "ABC" + Colour.RESET)
 
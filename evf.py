@@ -18,6 +18,7 @@ e.g.
 Current Version
 - Keys are all strings
 - stores values as NoneType, str, int, float, or bool
+- only the exact words true and false (in any case) are bools, a schema can give the type of known keys
 
 Example Usage to get variable in the global scope:
     settings = evf.Reader("settings.evf", str.lower)
@@ -27,73 +28,340 @@ Example Usage to get variable in the global scope:
         if entry in validSettings.keys():
             name = validSettings[entry] if validSettings[entry] is not None else entry
             globals()[name] = settings[entry]
+
+Large files can be processed one entry at a time without building a dictionary:
+    for key, value in evf.iter_entries("save.evf"):
+        ...
+
+Files with many keys of which only a few are needed can be opened with IndexedReader, which only decodes the values
+that are looked up:
+    with evf.IndexedReader("level.evf") as level:
+        spawn = level["spawn"]
+
+Files that rarely change can be compiled to a binary companion (settings.evfc) that Reader loads while the file is
+unchanged, either with evf.compile_binary("settings.evf") or evf.Reader("settings.evf", cache=True)
 """
 # todo add documentation, Impliment Unittest
+import hashlib
+import json
+import mmap
+import os
 import re
+import struct
+import sys
+import tempfile
+import warnings
+from array import array
+from collections import OrderedDict
 
+# Size of the pieces a file is read in when streaming
+CHUNK_SIZE = 1 << 16
 
-class Reader:
+# Characters values that may be numbers start and end with
+_NUMBER_FIRST = frozenset("0123456789+-.")
+_NUMBER_LAST = frozenset("0123456789.")
+_BOOLEAN_FIRST = frozenset("tTfF")
+_BOOLEANS = {"true": True, "false": False}
+
+
+def _chunks(source, size=CHUNK_SIZE):
     """
-    This class is used to take an open .evf and store the contents in a dictionary.
-    To access the variables by name, use the .__getitem__ method on the class with the
-    variable's name, or iterate through the object to get all items in the dictionary.
+    :param source: file name, open (text) file or iterable of strings
+    :returns an iterator of the strings in source
     """
-    __keys = None
-    __info = None
+    if isinstance(source, str):
+        with open(source, "r") as file:
+            yield from iter(lambda: file.read(size), "")
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(size), "")
+    else:
+        yield from source
 
-    __current_pos = None
 
-    RE_keys = re.compile("(?<=\[)[^\]]+(?=])", re.VERBOSE)
-    RE_values = re.compile("(?<=])[^\[\]]+((?=\[)|(?= ))")
+def _tokenize(chunks):
+    """
+    Splits the text into (key, raw value) pairs in one pass, entries can be split across chunks.
+    The raw value is the stripped text between the key and the next key, None when there is no text at all
+    """
+    key = None
+    in_key = False
+    # Pieces of the key or value currently being read
+    parts = []
+    for chunk in chunks:
+        pos, length = 0, len(chunk)
+        while pos < length:
+            if in_key:
+                end = chunk.find("]", pos)
+                if end < 0:
+                    parts.append(chunk[pos:])
+                    break
+                parts.append(chunk[pos:end])
+                # Empty keys ([]) are skipped along with their value
+                key = "".join(parts) or None
+                parts = []
+                in_key = False
+                pos = end + 1
+            else:
+                start = chunk.find("[", pos)
+                if start < 0:
+                    if key is not None:
+                        parts.append(chunk[pos:])
+                    break
+                if key is not None:
+                    parts.append(chunk[pos:start])
+                    raw = "".join(parts)
+                    yield key, raw.strip() if raw else None
+                    key = None
+                parts = []
+                in_key = True
+                pos = start + 1
+
+    # An unterminated key at the end is not a key
+    if key is not None and not in_key:
+        raw = "".join(parts)
+        yield key, raw.strip() if raw else None
+
+
+def decode(value):
+    """
+    Converts a raw value to the type it looks like. The first character decides what is tried, so text is
+    returned without any conversion attempts
+    :type value: str or None
+    :returns int, float, bool (only the exact words true and false, in any case), the value itself otherwise
+    """
+    if not value:
+        return value
+    first = value[0]
+    if first in _NUMBER_FIRST:
+        if value.isdecimal():
+            return int(value)
+        # int and float also accept e.g. 1_000, which is kept as text
+        if value[-1] in _NUMBER_LAST and "_" not in value:
+            if first in "+-" and value[1:].isdecimal():
+                return int(value)
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    elif first in _BOOLEAN_FIRST:
+        boolean = _BOOLEANS.get(value.lower())
+        if boolean is not None:
+            return boolean
+    return value
+
+
+def _to_bool(value):
+    boolean = _BOOLEANS.get(value.lower())
+    if boolean is None:
+        raise ValueError("invalid literal for bool: {!r}".format(value))
+    return boolean
+
+
+def _decoder(schema):
+    """
+    :param schema: dict of key: type (or any function taking the raw string), keys not in it are decoded by type
+    :returns a function(key, raw value) that returns the decoded value
+    """
+    if not schema:
+        return lambda key, value: decode(value)
 
-    def __init__(self, fileName, keyFunc= None):
-        """
-        Reads the file and stores the variables in memory
-        :type fileName: str
-        """
-        if keyFunc is None:
-            keyFunc = lambda __key: __key
+    converters = {key: _to_bool if kind is bool else kind for key, kind in schema.items()}
+
+    def decode_entry(key, value):
+        convert = converters.get(key)
+        if convert is None or value is None:
+            return decode(value)
+        try:
+            return convert(value)
+        except ValueError as error:
+            raise ValueError("[{}] {}".format(key, error)) from error
+    return decode_entry
 
-        file = open(fileName, "r")
-        info = {}
 
-        f_c = file.read() + " "
+def iter_entries(source, keyFunc=None, schema=None):
+    """
+    Reads the entries of an evf one at a time without keeping the file in memory
+    :param source: file name, open (text) file or iterable of strings (e.g. chunks received over a socket)
+    :param keyFunc: function applied to every key
+    :param schema: dict of key: type for keys whose type is known, e.g. {"width": int, "fullscreen": bool}.
+                   Keys are matched after keyFunc is applied
+    :returns a generator of (key, value) in the order they appear, repeated keys are yielded every time
+    :raises ValueError when a value does not match the type in the schema
+    """
+    if not schema:
+        for key, value in _tokenize(_chunks(source)):
+            yield (keyFunc(key) if keyFunc is not None else key), decode(value)
+        return
 
-        keys = re.finditer(self.RE_keys, f_c)
-        values = [value for value in re.finditer(self.RE_values, f_c)]
+    decode_entry = _decoder(schema)
+    for key, value in _tokenize(_chunks(source)):
+        if keyFunc is not None:
+            key = keyFunc(key)
+        yield key, decode_entry(key, value)
 
-        for key in keys:
-            if not values:
-                info[key.group()] = None
 
-            while values:
-                value = values[0]
+# Binary companion (<file>c): header, a kind per entry, the int and float values, the keys joined by ] and
+# the text values joined by [. Neither character can appear in what they join
+_BINARY_MAGIC = b"EVFC"
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sBxxxIIIIQQQq16s")
+_NONE, _STR, _INT, _FLOAT, _TRUE, _FALSE, _BIG_INT = range(7)
+_INT_RANGE = range(-1 << 63, 1 << 63)
 
-                if key.end() + 1 < value.start():
-                    info[keyFunc(key.group())] = None
-                    break
 
-                values.pop(0)
-                if key.end() + 1 == value.start():
-                    info[keyFunc(key.group())] = value.group().strip()
-                    break
+def _binary_path(fileName):
+    return fileName + "c"
 
-        for key in info:
-            if re.search("^\d+$",info[key]):
-                info[key] = int(info[key])
 
-            elif re.search("^\d+\.\d+$",info[key]):
-                info[key] = float(info[key])
+def _file_hash(fileName):
+    with open(fileName, "rb") as file:
+        return hashlib.blake2b(file.read(), digest_size=16).digest()
+
+
+def compile_binary(fileName):
+    """
+    Writes the binary companion of an .evf next to it, Reader loads it instead of parsing the file while the
+    file is unchanged
+    :type fileName: str
+    :returns the (keys, values) that were written
+    """
+    stat, digest, keys, values = _parse_for_binary(fileName)
+    _write_binary(fileName, stat, digest, keys, values)
+    return keys, values
+
+
+def _parse_for_binary(fileName):
+    """:returns the stat and hash of the file, taken before it is parsed, and its keys and values"""
+    stat = os.stat(fileName)
+    digest = _file_hash(fileName)
+    keys, values = [], []
+    for key, value in iter_entries(fileName):
+        keys.append(key)
+        values.append(value)
+    return stat, digest, keys, values
+
+
+def _write_binary(fileName, stat, digest, keys, values):
+    kinds, ints, floats, strings = array("B"), array("q"), array("d"), []
+    for value in values:
+        if value is None:
+            kinds.append(_NONE)
+        elif value is True:
+            kinds.append(_TRUE)
+        elif value is False:
+            kinds.append(_FALSE)
+        elif isinstance(value, int):
+            if value in _INT_RANGE:
+                kinds.append(_INT)
+                ints.append(value)
+            else:
+                kinds.append(_BIG_INT)
+                strings.append(str(value))
+        elif isinstance(value, float):
+            kinds.append(_FLOAT)
+            floats.append(value)
+        else:
+            kinds.append(_STR)
+            strings.append(value)
+
+    key_data = "]".join(keys).encode("utf-8")
+    string_data = "[".join(strings).encode("utf-8")
+    path = _binary_path(fileName)
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(temp, "wb") as file:
+            file.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, len(kinds), len(ints), len(floats),
+                                           len(strings), len(key_data), len(string_data), stat.st_size,
+                                           stat.st_mtime_ns, digest))
+            file.write(kinds.tobytes() + ints.tobytes() + floats.tobytes() + key_data + string_data)
+        os.replace(temp, path)
+    except OSError:
+        # A half written companion is never left behind
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def _load_binary(fileName):
+    """:returns the (keys, values) of the binary companion, None when there is none or it is out of date"""
+    try:
+        stat = os.stat(fileName)
+        with open(_binary_path(fileName), "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    if len(data) < _BINARY_HEADER.size:
+        return None
+
+    magic, version, count, int_count, float_count, string_count, key_length, string_length, size, mtime, digest = \
+        _BINARY_HEADER.unpack_from(data)
+    if magic != _BINARY_MAGIC or version != _BINARY_VERSION or size != stat.st_size:
+        return None
+    # A copied or checked out file has a new mtime but the same contents
+    if mtime != stat.st_mtime_ns and digest != _file_hash(fileName):
+        return None
+
+    view = memoryview(data)
+    pos = _BINARY_HEADER.size
+    kinds = view[pos:pos + count]
+    pos += count
+    ints = array("q")
+    ints.frombytes(view[pos:pos + int_count * 8])
+    pos += int_count * 8
+    floats = array("d")
+    floats.frombytes(view[pos:pos + float_count * 8])
+    pos += float_count * 8
+    keys = str(view[pos:pos + key_length], "utf-8").split("]") if count else []
+    pos += key_length
+    strings = str(view[pos:pos + string_length], "utf-8").split("[") if string_count else []
+
+    next_int, next_float, next_string = iter(ints).__next__, iter(floats).__next__, iter(strings).__next__
+    getters = (lambda: None, next_string, next_int, next_float, lambda: True, lambda: False,
+               lambda: int(next_string()))
+    values = [getters[kind]() for kind in kinds]
+    return keys, values
+
 
-            elif re.search(re.compile("True", re.I), info[key]):
-                info[key] = True
+class Reader:
+    """
+    This class is used to take an open .evf and store the contents in a dictionary.
+    To access the variables by name, use the .__getitem__ method on the class with the
+    variable's name, or iterate through the object to get all items in the dictionary.
+    """
+    __keys = None
+    __info = None
 
-            elif re.search(re.compile("False", re.I), info[key]):
-                info[key] = False
+    __current_pos = None
 
-        self.__info = info
-        self.__keys = [key for key in info.keys()]
-        file.close()
+    def __init__(self, fileName, keyFunc= None, schema=None, cache=False):
+        """
+        Reads the file and stores the variables in memory. The file is parsed as it is read, unless it has an up
+        to date binary companion (see compile_binary), which is loaded instead when no schema is given
+        :param fileName: file name, open (text) file or iterable of strings
+        :param schema: dict of key: type for keys whose type is known, see iter_entries
+        :param cache: write the binary companion when the file had to be parsed, the file is still read when
+                      the companion can't be written (e.g. a read only directory)
+        """
+        compiled = None
+        if isinstance(fileName, str) and not schema:
+            compiled = _load_binary(fileName)
+            if compiled is None and cache:
+                stat, digest, keys, values = _parse_for_binary(fileName)
+                compiled = keys, values
+                try:
+                    _write_binary(fileName, stat, digest, keys, values)
+                except OSError:
+                    pass
+
+        # Later entries with the same key replace the value but keep the first position
+        if compiled is not None:
+            keys, values = compiled
+            if keyFunc is not None:
+                keys = map(keyFunc, keys)
+            self.__info = dict(zip(keys, values))
+        else:
+            self.__info = dict(iter_entries(fileName, keyFunc, schema))
+        self.__keys = list(self.__info)
 
     def __iter__(self):
         self.__current_pos = 0
@@ -113,8 +381,8 @@ class Reader:
         :raises KeyError
         :returns variable stored with item's name
         """
-        if item not in self.__keys:
-            raise KeyError
+        if item not in self.__info:
+            raise KeyError(item)
         return self.__info[item]
 
     # def map(self, keysFunc= None, output=False, **names_vars):
@@ -140,14 +408,186 @@ class Reader:
         return tuple(self.__keys)
 
 
-class Writer:
-    def __init__(self, fileName):
+class IndexedReader:
+    """
+    Random access to large .evf files. The file is memory mapped and only an index of where each value is
+    is kept, a value is decoded the first time it is looked up.
+    The index is saved next to the file (<file>.idx) and used again while the file's size and mtime are unchanged.
+    The file is expected to be UTF-8
+    """
+    INDEX_VERSION = 1
+
+    # Same rules as _tokenize: a key runs to the first ], its value to the next [
+    RE_entry = re.compile(rb"\[([^\]]*)\]([^\[]*)")
+
+    def __init__(self, fileName, keyFunc=None, cache_size=1024, use_index_file=True, schema=None):
         """
-        Reads the __file and stores the variables in memory
         :type fileName: str
+        :param schema: dict of key: type for keys whose type is known, see iter_entries
+        :param cache_size: most decoded values kept in memory, the least recently used are dropped first
+        :param use_index_file: load the index from, and save it to, the sidecar index file
+        """
+        self.__file = open(fileName, "rb")
+        stat = os.fstat(self.__file.fileno())
+        # Empty files can't be mapped
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self.cache_size = cache_size
+        self.__cache = OrderedDict()
+        self.__decode = _decoder(schema)
+
+        header = {"version": self.INDEX_VERSION, "signature": [stat.st_size, stat.st_mtime_ns],
+                  "byteorder": sys.byteorder}
+        index_file = fileName + ".idx"
+        index = self.__load_index(index_file, header) if use_index_file else None
+        if index is None:
+            index = self.__build_index(self.__data)
+            if use_index_file:
+                self.__save_index(index_file, header, index)
+        keys, self.__starts, self.__ends = index
+
+        # Line endings are translated like a file opened as text
+        keys = keys.decode("utf-8").replace("\r\n", "\n").split("]") if keys else []
+        if keyFunc is not None:
+            keys = map(keyFunc, keys)
+        # Key -> position of its span, later entries with the same key replace the span
+        self.__positions = dict(zip(keys, range(len(self.__starts))))
+
+    @classmethod
+    def __build_index(cls, data):
+        """:returns the keys (joined by ]) and arrays of the start and end of each raw value"""
+        keys, starts, ends = [], array("q"), array("q")
+        for match in cls.RE_entry.finditer(data):
+            # Empty keys ([]) are skipped along with their value
+            if match.end(1) > match.start(1):
+                keys.append(match.group(1))
+                starts.append(match.start(2))
+                ends.append(match.end(2))
+        return b"]".join(keys), starts, ends
+
+    @staticmethod
+    def __load_index(index_file, header):
+        """:returns the saved index, None when there is none or it is out of date"""
+        try:
+            with open(index_file, "rb") as file:
+                saved = json.loads(file.readline().decode("utf-8"))
+                if saved.get("header") != header:
+                    return None
+                starts, ends = array("q"), array("q")
+                starts.fromfile(file, saved["count"])
+                ends.fromfile(file, saved["count"])
+                return file.read(), starts, ends
+        except (OSError, ValueError, EOFError, KeyError, AttributeError):
+            return None
+
+    @staticmethod
+    def __save_index(index_file, header, index):
+        keys, starts, ends = index
+        # Written to a temporary file first so other readers never see a partial index
+        temp = "{}.{}.tmp".format(index_file, os.getpid())
+        try:
+            with open(temp, "wb") as file:
+                file.write(json.dumps({"header": header, "count": len(starts)}).encode("utf-8") + b"\n")
+                starts.tofile(file)
+                ends.tofile(file)
+                file.write(keys)
+            os.replace(temp, index_file)
+        except OSError:
+            # The index is only an optimisation, e.g. the directory may be read only
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def __iter__(self):
+        return iter(self.__positions)
+
+    def __len__(self):
+        return len(self.__positions)
+
+    def __contains__(self, item):
+        return item in self.__positions
+
+    def __getitem__(self, item):
+        """
+        :raises KeyError
+        :returns variable stored with item's name
         """
+        cache = self.__cache
+        if item in cache:
+            cache.move_to_end(item)
+            return cache[item]
+        if item not in self.__positions:
+            raise KeyError(item)
+
+        position = self.__positions[item]
+        raw = self.__data[self.__starts[position]:self.__ends[position]].decode("utf-8").replace("\r\n", "\n")
+        value = self.__decode(item, raw.strip() if raw else None)
+        if self.cache_size > 0:
+            cache[item] = value
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return value
+
+    @property
+    def keys(self):
+        return tuple(self.__positions)
+
+    def close(self):
+        if self.__data:
+            self.__data.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
 
-        self.__file = open(fileName, "w")
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _new_file_mode(fileName):
+    """:returns the permissions of the file, or the ones open would give a new file"""
+    try:
+        return os.stat(fileName).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class Writer:
+    """
+    Writes variables to an .evf. write and write_many can be called any number of times until the writer is closed.
+    Entries are formatted into a buffer and written in blocks of about buffer_size characters.
+    Unless appending, the entries go to a temporary file that replaces the file when the writer is closed, so readers
+    never see a partially written file. Leaving a with block because of an error keeps the old file.
+    A writer that is dropped without being closed is closed when it is garbage collected, with a ResourceWarning
+    """
+    def __init__(self, fileName, append=False, buffer_size=1 << 16):
+        """
+        :type fileName: str
+        :param append: add to the end of the file instead of replacing it, entries are then written to it directly
+        :param buffer_size: characters formatted before they are written, 0 writes every call straight away
+        """
+        self.__name = fileName
+        self.__temp = None
+        self.__file = None
+        if append:
+            self.__file = open(fileName, "a")
+        else:
+            # In the same directory so os.replace never has to move it between file systems
+            fd, self.__temp = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(fileName) + ".",
+                                               dir=os.path.dirname(os.path.abspath(fileName)))
+            try:
+                # By path, Windows only takes a file descriptor from Python 3.13
+                os.chmod(self.__temp, _new_file_mode(fileName))
+                self.__file = os.fdopen(fd, "w")
+            except BaseException:
+                os.close(fd)
+                os.remove(self.__temp)
+                raise
+        self.buffer_size = buffer_size
+        self.__buffer = []
+        self.__buffered = 0
 
     # def write_from_globals(self, **vars_names):
     #     """
@@ -163,20 +603,89 @@ class Writer:
     #                 outFile.write("[{}]{}\n".format(name, globals()[entry]))
 
     def write(self, **vars_vals):
-        with self.__file as outFile:
-            for name in vars_vals:
-                outFile.write("[{}]{}\n".format(name, vars_vals[name]))
+        self.write_many(vars_vals.items())
 
-    def __del__(self):
+    def write_many(self, entries):
+        """
+        Writes entries as they are produced, so generators are never materialised
+        :param entries: dict or iterable of (name, value). None is written as a variable without data
+        """
+        if self.__file is None:
+            raise ValueError("I/O operation on a closed Writer")
+        if isinstance(entries, dict):
+            entries = entries.items()
+
+        buffer = self.__buffer
+        append = buffer.append
+        buffered = self.__buffered
+        for name, value in entries:
+            # Without a newline the next key follows straight away, which is read back as None
+            entry = "[{}]".format(name) if value is None else "[{}]{}\n".format(name, value)
+            append(entry)
+            buffered += len(entry)
+            if buffered >= self.buffer_size:
+                self.__file.write("".join(buffer))
+                buffer.clear()
+                buffered = 0
+        self.__buffered = buffered
+
+    def flush(self):
+        """Writes the buffered entries to the file"""
+        if self.__file is None:
+            return
+        if self.__buffer:
+            self.__file.write("".join(self.__buffer))
+            self.__buffer.clear()
+            self.__buffered = 0
+        self.__file.flush()
+
+    def close(self):
+        """Writes the buffered entries and replaces the file with the ones written"""
+        if self.__file is None:
+            return
+        self.flush()
+        self.__file.close()
+        self.__file = None
+        if self.__temp is not None:
+            os.replace(self.__temp, self.__name)
+
+    def __discard(self):
+        """Closes without replacing the file, appended entries that were already written stay"""
+        if self.__file is None:
+            return
+        if self.__temp is None:
+            self.close()
+            return
         self.__file.close()
+        self.__file = None
+        os.remove(self.__temp)
+
+    @property
+    def closed(self):
+        return self.__file is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.__discard()
+
+    def __del__(self):
+        # The file may never have been opened
+        if getattr(self, "_Writer__file", None) is not None:
+            warnings.warn("unclosed Writer of '{}'".format(self.__name), ResourceWarning, source=self)
+            self.close()
 
 
 if __name__ == "__main__":
     width = 200
     height = 100
 
-    writer = Writer("test.evf")
-    writer.write(width=width, height=height)
+    with Writer("test.evf") as writer:
+        writer.write(width=width, height=height)
 
     reader = Reader("test.evf", str.lower)
 
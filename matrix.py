@@ -3,26 +3,112 @@
 # File: matrix.py
 # Description: Matrix class to store 2-d arrays
 
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
+
 
 class Matrix:
     """
     Stored row - displayed row major
     starts at upper left hand corner
     """
-    def __init__(self, x, y, fill=None):
+    def __init__(self, x, y, fill=None, use_numpy=False, cell_width=1):
+        """
+        :param use_numpy: store the elements in a numpy array of fixed width strings instead of lists,
+                          filling, transposing, overlaying and displaying are then vectorised
+        :param cell_width: most characters a numpy backed element holds, longer values are cut off
+        """
         if fill is None:
             fill = " "
-        # self.elements = [["{:>04}".format(i*x + j) for i in range(y)] for j in range(x)]
-        self.elements = [[fill for i in range(y)] for j in range(x)]
+        if use_numpy:
+            if _numpy is None:
+                raise ImportError("numpy is required for a numpy backed Matrix")
+            self.elements = _numpy.full((x, y), fill, dtype="<U{}".format(cell_width))
+        else:
+            # self.elements = [["{:>04}".format(i*x + j) for i in range(y)] for j in range(x)]
+            self.elements = [[fill] * y for j in range(x)]
         self.__rows = x
         self.__columns = y
+        # Offset into elements, only views of list backed matrices share their elements with another matrix.
+        # Numpy backed views are numpy views of the array instead
+        self.__x = 0
+        self.__y = 0
+        self.__is_view = False
+
+    @classmethod
+    def __wrap(cls, array):
+        """Makes a numpy backed matrix that uses the given array as its elements"""
+        matrix = cls.__new__(cls)
+        matrix.elements = array
+        matrix.__rows, matrix.__columns = array.shape
+        matrix.__x = matrix.__y = 0
+        matrix.__is_view = False
+        return matrix
+
+    @property
+    def uses_numpy(self):
+        return _numpy is not None and isinstance(self.elements, _numpy.ndarray)
+
+    def view(self, x, y, rows, columns):
+        """
+        Makes a matrix of the region starting at (x, y) that shares its elements with this matrix,
+        writing to either one changes both. The region is clipped to this matrix
+        :returns: Matrix
+        """
+        left, top = max(0, x), max(0, y)
+        right, bottom = min(self.__rows, x + rows), min(self.__columns, y + columns)
+        if self.uses_numpy:
+            return Matrix.__wrap(self.elements[left:max(left, right), top:max(top, bottom)])
+
+        view = Matrix.__new__(Matrix)
+        view.elements = self.elements
+        view.__rows = max(0, right - left)
+        view.__columns = max(0, bottom - top)
+        view.__x = self.__x + left
+        view.__y = self.__y + top
+        view.__is_view = True
+        return view
 
     def __str__(self):
-        e = [[str(j) for j in i] for i in zip(*self.elements)]
+        if self.uses_numpy:
+            return "\n".join(" ".join(row) for row in self.elements.T.tolist())
+        rows = (row[self.__y:self.__y + self.__columns] for row in self.elements[self.__x:self.__x + self.__rows])
+        e = [[str(j) for j in i] for i in zip(*rows)]
         return "\n".join(" ".join(i) for i in e)
 
     def __getitem__(self, item):
-        return self.elements[item]
+        if not self.__is_view:
+            return self.elements[item]
+        if not -self.__rows <= item < self.__rows:
+            raise IndexError("matrix index out of range")
+        return _MatrixRow(self.elements[self.__x + item % self.__rows], self.__y, self.__columns)
+
+    def segment(self, row, start, stop):
+        """:returns a list of the elements in [start, stop) of the row"""
+        if self.uses_numpy:
+            return self.elements[row, start:stop].tolist()
+        return self.elements[self.__x + row][self.__y + start:self.__y + stop]
+
+    def fill(self, value):
+        """Sets every element to value"""
+        if self.uses_numpy:
+            self.elements[...] = value
+            return
+        for row in self.elements[self.__x:self.__x + self.__rows]:
+            row[self.__y:self.__y + self.__columns] = [value] * self.__columns
+
+    def transpose(self):
+        """
+        :returns a Matrix with the rows and columns swapped. For numpy backed matrices it is a view of this matrix
+        """
+        if self.uses_numpy:
+            return Matrix.__wrap(self.elements.T)
+        transposed = Matrix(self.__columns, self.__rows)
+        rows = (row[self.__y:self.__y + self.__columns] for row in self.elements[self.__x:self.__x + self.__rows])
+        transposed.elements = [list(column) for column in zip(*rows)]
+        return transposed
 
     def writeMatrix(self, other, x=0, y=0):
         """
@@ -32,15 +118,85 @@ class Matrix:
         :type other: Matrix
         :returns: None
         """
+        self.blit(other, x, y)
 
-        # Use self.rows as the range instead?
-        for i in range(other.rows):
-            if 0 > i + x or i + x >= self.rows:
-                continue
-            for j in range(other.columns):
-                if 0 > j + y or j + y >= self.columns:
+    def __overlap(self, other, x, y):
+        """:returns the (first row, last row, first column, last column) of other that lands on this matrix"""
+        first_row, last_row = max(0, -x), min(other.rows, self.__rows - x)
+        first_column, last_column = max(0, -y), min(other.columns, self.__columns - y)
+        if first_row >= last_row or first_column >= last_column:
+            return None
+        return first_row, last_row, first_column, last_column
+
+    def blit(self, other, x=0, y=0):
+        """
+        Copies another matrix (or view) on-top of the current matrix, clipped to the current matrix.
+        Each row is copied as one slice, or the whole region at once when both are numpy backed
+        :param x: x offset
+        :param y: y offset
+        :type other: Matrix
+        :returns: None
+        """
+        overlap = self.__overlap(other, x, y)
+        if overlap is None:
+            return None
+        first_row, last_row, first_column, last_column = overlap
+
+        if self.uses_numpy:
+            if other.uses_numpy:
+                source = other.elements[first_row:last_row, first_column:last_column]
+            else:
+                source = [other.segment(i, first_column, last_column) for i in range(first_row, last_row)]
+            self.elements[x + first_row:x + last_row, y + first_column:y + last_column] = source
+            return None
+
+        source, target = other.elements, self.elements
+        source_x, target_x = other.__x, self.__x + x
+        target_y = self.__y + y
+        rows = range(first_row, last_row)
+        # Overlapping regions of the same elements are copied from the far end so rows are read before written
+        if source is target and target_x > source_x:
+            rows = reversed(rows)
+
+        for i in rows:
+            target[target_x + i][target_y + first_column:target_y + last_column] = \
+                other.segment(i, first_column, last_column)
+
+    def overlay(self, other, x=0, y=0, transparent=None, mask=None):
+        """
+        Like blit, but elements of other equal to transparent, or where mask is False, are not copied
+        :param mask: Matrix (or nested sequence) of booleans the same size as other
+        :returns: None
+        """
+        overlap = self.__overlap(other, x, y)
+        if overlap is None:
+            return None
+        first_row, last_row, first_column, last_column = overlap
+
+        if self.uses_numpy and other.uses_numpy:
+            source = other.elements[first_row:last_row, first_column:last_column]
+            keep = _numpy.ones(source.shape, dtype=bool)
+            if transparent is not None:
+                keep &= source != transparent
+            if mask is not None:
+                if isinstance(mask, Matrix) and mask.uses_numpy:
+                    mask = mask.elements[first_row:last_row, first_column:last_column]
+                elif isinstance(mask, Matrix):
+                    # The elements of a list backed view are those of the whole matrix it views
+                    mask = [mask.segment(i, first_column, last_column) for i in range(first_row, last_row)]
+                else:
+                    mask = _numpy.asarray(mask, dtype=bool)[first_row:last_row, first_column:last_column]
+                keep &= _numpy.asarray(mask, dtype=bool)
+            _numpy.copyto(self.elements[x + first_row:x + last_row, y + first_column:y + last_column],
+                          source, where=keep)
+            return None
+
+        for i in range(first_row, last_row):
+            target = self[x + i]
+            for j, value in enumerate(other.segment(i, first_column, last_column), first_column):
+                if value == transparent or (mask is not None and not mask[i][j]):
                     continue
-                self[i + x][j + y] = other[i][j]
+                target[y + j] = value
 
     @property
     def rows(self):
@@ -51,6 +207,40 @@ class Matrix:
         return self.__columns
 
 
+class _MatrixRow:
+    """A row of a matrix view, indexes are offset into the row of the matrix it views"""
+    def __init__(self, row, offset, length):
+        self.__row = row
+        self.__offset = offset
+        self.__length = length
+
+    def __len__(self):
+        return self.__length
+
+    def __iter__(self):
+        return iter(self.__row[self.__offset:self.__offset + self.__length])
+
+    def __index(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.__length)
+            stop = self.__offset + stop if stop >= 0 or self.__offset else None
+            return slice(self.__offset + start, stop, step)
+        if not -self.__length <= item < self.__length:
+            raise IndexError("matrix index out of range")
+        return self.__offset + item % self.__length
+
+    def __getitem__(self, item):
+        return self.__row[self.__index(item)]
+
+    def __setitem__(self, item, value):
+        index = self.__index(item)
+        # A view can't change the length of the rows it shares
+        if isinstance(index, slice) and len(value) != len(range(*item.indices(self.__length))):
+            raise ValueError("can't assign {} values to a slice of {}".format(
+                len(value), len(range(*item.indices(self.__length)))))
+        self.__row[index] = value
+
+
 # class PopMatrix(Matrix):
 #     __invalid = []
 #
@@ -8,8 +8,15 @@ import os as _os
 if _os.getcwd() == '__main__':
     exit(-1)
 
-if not _os.path.exists("./logs"):
-    _os.mkdir("./logs")
+
+class _LogFileHandler(_logging.FileHandler):
+    """File handler that only makes the logs directory and opens its file once something is logged"""
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        _os.makedirs(_os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 
 class Logger(_logging.Logger):
@@ -30,7 +37,7 @@ class Logger(_logging.Logger):
         """
         super().__init__(name, level)
         log_file = _os.path.basename(log_file)
-        file_handler = _logging.FileHandler("./logs/" + log_file)
+        file_handler = _LogFileHandler("./logs/" + log_file)
 
         if not format_str:
             format_str = "{levelname:^8} |[{asctime}]|  {message}"
@@ -0,0 +1,45 @@
+# Author: Jacob Tsekrekos
+# Date: Oct 18, 2026
+# File: timing.py
+# Description: Timing helpers for profiling the engine
+from collections import deque as _deque
+
+
+class RollingStats:
+    """Keeps the most recent samples of a measurement and reports percentiles over them"""
+    def __init__(self, size=240):
+        """
+        :type size: int     :param size: amount of samples kept, older samples are discarded
+        """
+        self.__samples = _deque(maxlen=size)
+
+    def __len__(self):
+        return len(self.__samples)
+
+    def add(self, sample):
+        self.__samples.append(sample)
+
+    def clear(self):
+        self.__samples.clear()
+
+    def percentile(self, percent):
+        """
+        :param percent: number between 0 and 100
+        :returns the sample at the percentile (nearest rank), None when there are no samples
+        """
+        if not self.__samples:
+            return None
+        ordered = sorted(self.__samples)
+        rank = round(percent / 100 * (len(ordered) - 1))
+        return ordered[rank]
+
+    def summary(self, percents=(50, 95, 99)):
+        """:returns a dict of 'p<percent>': value as well as the mean and the amount of samples"""
+        if not self.__samples:
+            return {"count": 0}
+
+        ordered = sorted(self.__samples)
+        out = {"count": len(ordered), "mean": sum(ordered) / len(ordered)}
+        for percent in percents:
+            out["p{}".format(percent)] = ordered[round(percent / 100 * (len(ordered) - 1))]
+        return out